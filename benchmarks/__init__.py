@@ -0,0 +1,52 @@
+"""
+Benchmarks for flanker, run them as modules from the repository root:
+
+    $ python -m benchmarks.mime_memory
+
+They use the test fixtures and are not part of the distribution.
+"""
+import glob
+import gc
+import sys
+import types
+
+from os.path import join, abspath, dirname, basename
+
+
+def fixtures_path():
+    return join(dirname(dirname(abspath(__file__))), "tests", "fixtures")
+
+
+def fixture_file(name):
+    return join(fixtures_path(), name)
+
+
+def message_fixtures():
+    """Returns a list of (name, message string) pairs for all fixture
+    messages"""
+    paths = sorted(glob.glob(fixture_file("messages/*.eml")) +
+                   glob.glob(fixture_file("messages/*/*.eml")))
+    return [(basename(p), open(p, 'rb').read()) for p in paths]
+
+
+_SKIP_TYPES = (type, types.ModuleType, types.FunctionType,
+               types.BuiltinFunctionType, types.ClassType)
+
+
+def deep_sizeof(obj, exclude=()):
+    """Returns the number of bytes taken by the object and all objects
+    reachable from it, except the excluded objects, classes, modules,
+    functions and interned strings (attribute names)"""
+    seen = set(id(o) for o in exclude)
+    pending = [obj]
+    size = 0
+    while pending:
+        o = pending.pop()
+        if id(o) in seen or isinstance(o, _SKIP_TYPES):
+            continue
+        if type(o) is str and intern(o) is o:
+            continue
+        seen.add(id(o))
+        size += sys.getsizeof(o)
+        pending.extend(gc.get_referents(o))
+    return size
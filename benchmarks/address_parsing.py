@@ -0,0 +1,47 @@
+"""
+Parsing time of the common address forms with and without the fast path
+matcher of the address parser.
+
+    $ python -m benchmarks.address_parsing
+"""
+import re
+import timeit
+
+from mock import patch
+
+from flanker.addresslib import address, parser
+
+
+SAMPLES = [
+    'john.smith@example.com',
+    'John Smith <john.smith@example.com>',
+    '"Smith, John" <john.smith@example.com>',
+    'John Smith <john.smith@example.com>, jane@example.com, '
+    'Bob <bob@mail.example.org>',
+]
+
+NEVER = re.compile('(?!)')
+
+
+def measure(fn, number=2000):
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number * 1e6
+
+
+def main():
+    print "{0:<60} {1:>10} {2:>10} {3:>8}".format(
+        "input", "full, us", "fast, us", "speedup")
+    for sample in SAMPLES:
+        if ',' in sample.replace('"Smith, John"', ''):
+            fn = lambda: address.parse_list(sample)
+        else:
+            fn = lambda: address.parse(sample)
+        fast = measure(fn)
+        with patch.object(parser, 'FAST_ADDRESS', NEVER), \
+                patch.object(parser, 'FAST_ADDR_SPEC', NEVER):
+            full = measure(fn)
+        print "{0:<60} {1:>10.1f} {2:>10.1f} {3:>7.1f}x".format(
+            sample[:60], full, fast, full / fast)
+
+
+if __name__ == '__main__':
+    main()
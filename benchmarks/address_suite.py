@@ -0,0 +1,277 @@
+"""
+Address parsing and validation benchmark harness: parse, parse_list
+(strict and relaxed), validate_address, validate_list, corrector.suggest
+and every ESP plugin over the tests/fixtures corpora.
+
+    $ python -m benchmarks.address_suite
+    $ python -m benchmarks.address_suite --save baseline.json
+    $ python -m benchmarks.address_suite --compare baseline.json
+
+DNS, the MX cache (redis) and the SMTP connection to the mail exchangers
+are replaced with deterministic in-process fakes, so nothing goes over
+the network and the results only depend on the code. Validation is
+measured with an empty MX cache (cold, every domain is looked up in the
+fake DNS) and with a filled one (warm). The memo of the corrector is
+emptied before every suggestion, so the search is measured.
+
+Every operation is called over its corpus again and again for a while,
+the throughput (ops/sec) and the latency percentiles of single calls are
+reported, the latencies of the calls under a few microseconds are as
+coarse as the timer. In the comparison mode the exit status is 1 if the
+throughput of any operation dropped by more than the threshold.
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import zlib
+
+from mock import patch
+
+import flanker.addresslib
+from flanker.addresslib import address, corrector, validate
+from flanker.addresslib.plugins import (aol, gmail, google, hotmail, icloud,
+                                        yahoo)
+from benchmarks import fixture_file
+
+
+# seconds every operation is repeated for
+TIME_BUDGET = 0.5
+THRESHOLD = 0.1
+PERCENTILES = [50, 90, 99]
+
+# the mail exchangers of the ESPs, they select the plugins
+ESP_EXCHANGERS = {
+    'yahoo.com': 'mta5.am0.yahoodns.net',
+    'gmail.com': 'gmail-smtp-in.l.google.com',
+    'aol.com': 'mailin-01.mx.aol.com',
+    'icloud.com': 'mx1.mail.icloud.com',
+    'hotmail.com': 'mx1.hotmail.com',
+    'mailgun.net': 'aspmx.l.google.com',
+}
+
+LIST_SIZE = 5
+
+
+class FakeDNS(dict):
+    """DNS lookup that resolves the ESP domains to their mail exchangers,
+    one in ten of the other domains to nothing and the rest to mx.<domain>"""
+
+    def __missing__(self, fqdn):
+        domain = fqdn.rstrip('.').lower()
+        if domain in ESP_EXCHANGERS:
+            return [ESP_EXCHANGERS[domain]]
+        if zlib.crc32(domain) % 10 == 0:
+            return []
+        return ['mx.' + domain]
+
+
+class FakeRedis(dict):
+    """MX cache with the interface of RedisCache"""
+
+    def __getitem__(self, key):
+        return self.get(key)
+
+    def get_many(self, keys):
+        return dict((k, self[k]) for k in keys if k in self)
+
+    def set_many(self, mapping):
+        self.update(mapping)
+
+
+def fake_connect(mx_hosts, *args, **kwargs):
+    # every mail exchanger accepts the connections
+    return mx_hosts[0]
+
+
+def read_corpus(name):
+    lines = (line.strip() for line in open(fixture_file(name)))
+    return [line for line in lines if line and not line.startswith('#')]
+
+
+def corpora():
+    mailboxes = (read_corpus('mailbox_valid.txt') +
+                 read_corpus('mailbox_invalid.txt'))
+    localparts = (read_corpus('abridged_localpart_valid.txt') +
+                  read_corpus('abridged_localpart_invalid.txt'))
+    esp_addresses = [lp + '@' + domain
+                     for domain in sorted(ESP_EXCHANGERS)
+                     for lp in localparts]
+    addresses = mailboxes + esp_addresses
+    lists = [', '.join(addresses[i:i + LIST_SIZE])
+             for i in xrange(0, len(addresses), LIST_SIZE)]
+    typos = [line.split(',')[0] for line in
+             read_corpus('domain_typos_valid.txt') +
+             read_corpus('domain_typos_invalid.txt')]
+    return addresses, lists, typos, localparts
+
+
+def operations(mx_cache=None):
+    """Returns (name, function, corpus, reset) tuples, `reset` (if not
+    None) is called before every call of the function and is not timed.
+    The cold operations empty `mx_cache`"""
+    mx_cache = FakeRedis() if mx_cache is None else mx_cache
+    # the memo of the default corrector would be filled by the warm-up
+    suggester = corrector.DomainCorrector(corrector.MOST_COMMON_DOMAINS,
+                                          corrector.LOOKUP_TABLE)
+    addresses, lists, typos, localparts = corpora()
+    ops = [
+        ('parse', address.parse, addresses, None),
+        ('parse addr_spec', lambda s: address.parse(s, addr_spec_only=True),
+         addresses, None),
+        ('parse_list relaxed', address.parse_list, lists, None),
+        ('parse_list strict', lambda s: address.parse_list(s, strict=True),
+         lists, None),
+        ('validate_address cold', address.validate_address, addresses,
+         mx_cache.clear),
+        ('validate_address warm', address.validate_address, addresses, None),
+        ('validate_list cold', address.validate_list, lists, mx_cache.clear),
+        ('validate_list warm', address.validate_list, lists, None),
+        ('corrector.suggest', suggester.suggest, typos, suggester.memo.clear),
+    ]
+    for plugin in (yahoo, gmail, aol, icloud, hotmail, google):
+        ops.append(('plugin ' + plugin.__name__.split('.')[-1],
+                    plugin.validate, localparts, None))
+    return ops
+
+
+def measure(fn, corpus, reset=None):
+    """Calls the function over the corpus for TIME_BUDGET seconds, returns
+    the throughput and the latency percentiles in microseconds. The
+    latencies are measured on every other pass. The throughput is measured
+    on the passes in between as a whole, so the timer does not add to the
+    cheap calls, or, if the calls are `reset`, as the sum of the latencies
+    of a pass, so the resets do not add to the calls. The best pass is
+    taken as the others are slowed down by the rest of the system"""
+    latencies = []
+    best = None
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        deadline = time.time() + TIME_BUDGET
+        while not latencies or time.time() < deadline:
+            timed = []
+            for item in corpus:
+                if reset:
+                    reset()
+                started = time.time()
+                fn(item)
+                timed.append(time.time() - started)
+            latencies.extend(timed)
+
+            if reset:
+                elapsed = sum(timed)
+            else:
+                started = time.time()
+                for item in corpus:
+                    fn(item)
+                elapsed = time.time() - started
+            best = elapsed if best is None else min(best, elapsed)
+    finally:
+        if enabled:
+            gc.enable()
+
+    latencies.sort()
+    result = {'ops': len(corpus) / best}
+    for p in PERCENTILES:
+        index = min(len(latencies) - 1, len(latencies) * p // 100)
+        result['p{0}'.format(p)] = latencies[index] * 1e6
+    result['max'] = latencies[-1] * 1e6
+    return result
+
+
+def run_suite(only=None):
+    """Returns {operation: result} for the operations which names start
+    with `only`, all by default"""
+    mx_cache = FakeRedis()
+    results = {}
+    with patch.object(flanker.addresslib, 'dns_lookup', FakeDNS()), \
+            patch.object(flanker.addresslib, 'mx_cache', mx_cache), \
+            patch.object(validate, 'connect_to_mail_exchanger',
+                         fake_connect):
+        for name, fn, corpus, reset in operations(mx_cache):
+            if only and not name.startswith(only):
+                continue
+            if reset is None:
+                # warm up the MX cache and the memos
+                for item in corpus:
+                    fn(item)
+            results[name] = measure(fn, corpus, reset)
+    return results
+
+
+def report(results, out=sys.stdout):
+    out.write("{0:<24} {1:>10} {2:>9} {3:>9} {4:>9} {5:>10}\n".format(
+        "operation", "ops/sec", "p50 us", "p90 us", "p99 us", "max us"))
+    for name, result in _rows(results):
+        out.write("{0:<24} {1:>10.0f} {2:>9.1f} {3:>9.1f} {4:>9.1f} "
+                  "{5:>10.1f}\n".format(name, result['ops'], result['p50'],
+                                        result['p90'], result['p99'],
+                                        result['max']))
+
+
+def compare(results, baseline, threshold=THRESHOLD, out=sys.stdout):
+    """Reports the throughput next to the baseline one, returns the number
+    of operations which throughput dropped by more than the threshold"""
+    regressions = 0
+    out.write("{0:<24} {1:>10} {2:>10} {3:>8} {4:>9}\n".format(
+        "operation", "ops/sec", "base", "change", "p99 us"))
+    for name, result in _rows(results):
+        base = baseline.get(name)
+        flag = ""
+        if base is None:
+            change = "new"
+        else:
+            ratio = result['ops'] / base['ops'] - 1
+            change = "{0:+.1%}".format(ratio)
+            if ratio < -threshold:
+                flag = "  SLOWER"
+                regressions += 1
+        out.write("{0:<24} {1:>10.0f} {2:>10} {3:>8} {4:>9.1f}{5}\n".format(
+            name, result['ops'],
+            "-" if base is None else "{0:.0f}".format(base['ops']),
+            change, result['p99'], flag))
+    return regressions
+
+
+def _rows(results):
+    for name, _, _, _ in operations():
+        if name in results:
+            yield name, results[name]
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="Address parsing and validation benchmarks")
+    parser.add_argument("--save", metavar="PATH",
+                        help="save the results as the baseline")
+    parser.add_argument("--compare", metavar="PATH",
+                        help="compare the results with the saved baseline")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="throughput drop reported as a regression, "
+                             "0.1 is 10%%")
+    parser.add_argument("--only", metavar="PREFIX",
+                        help="run the operations starting with the prefix")
+    args = parser.parse_args(args)
+
+    results = run_suite(args.only)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+    else:
+        report(results)
+        regressions = 0
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'python': platform.python_version(),
+                       'platform': platform.platform(),
+                       'results': results}, f, indent=1, sort_keys=True)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+Suggestion time of the domain corrector on the domain typo fixtures with
+a big dictionary: the built in domains plus random ones, scanned linearly
+and through the bigram index.
+
+    $ python -m benchmarks.corrector [dictionary size]
+"""
+import random
+import string
+import sys
+import time
+
+from flanker.addresslib import corrector
+from flanker.addresslib.corrector import DomainCorrector
+from benchmarks import fixture_file
+
+
+TLDS = ['com', 'net', 'org', 'de', 'co.uk', 'ru', 'fr', 'com.br', 'info']
+
+
+def random_domains(count, seed=0):
+    rnd = random.Random(seed)
+    for _ in xrange(count):
+        label = ''.join(rnd.choice(string.ascii_lowercase)
+                        for _ in xrange(rnd.randint(3, 12)))
+        yield label + '.' + rnd.choice(TLDS)
+
+
+def typos():
+    words = []
+    for name in ('domain_typos_valid.txt', 'domain_typos_invalid.txt'):
+        for line in open(fixture_file(name)):
+            line = line.strip()
+            if line and not line.startswith('#'):
+                words.append(line.split(',')[0])
+    return words
+
+
+def measure(corrector, words):
+    start = time.time()
+    suggestions = [corrector.suggest(w) for w in words]
+    return (time.time() - start) / len(words) * 1000, suggestions
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    domains = corrector.MOST_COMMON_DOMAINS + list(random_domains(size))
+    words = typos()
+
+    start = time.time()
+    indexed = DomainCorrector(domains, corrector.LOOKUP_TABLE, memo_size=0)
+    print "dictionary: {0} domains, indexed in {1:.1f} s".format(
+        len(domains), time.time() - start)
+
+    linear = DomainCorrector(domains, corrector.LOOKUP_TABLE,
+                             linear_limit=len(domains), memo_size=0)
+    sample = words[:20]
+    linear_ms, expected = measure(linear, sample)
+    indexed_ms, suggestions = measure(indexed, sample)
+    print "linear:  {0:8.2f} ms/word".format(linear_ms)
+    print "indexed: {0:8.2f} ms/word, {1} of {2} suggestions match".format(
+        indexed_ms, sum(a == b for a, b in zip(expected, suggestions)),
+        len(sample))
+
+    indexed_ms, _ = measure(indexed, words)
+    print "indexed, all {0} typos: {1:.2f} ms/word".format(
+        len(words), indexed_ms)
+
+    memoized = DomainCorrector(domains, corrector.LOOKUP_TABLE)
+    measure(memoized, words)
+    memoized_ms, _ = measure(memoized, words)
+    print "memoized: {0:.4f} ms/word".format(memoized_ms)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Tokenizing time and the number of tokens allocated for messages with
+many lines that start with "--" but are not boundaries: quoted
+signatures, diffs and markdown rules.
+
+    $ python -m benchmarks.mime_boundaries
+"""
+import timeit
+
+from flanker.mime.message import scanner
+from benchmarks import fixture_file
+
+
+DASHED = open(fixture_file("messages/dashed-boundaries.eml")).read()
+
+NOISE = "".join(
+    "-- \r\nJohn\r\n--- a/setup.py\r\n+++ b/setup.py\r\n"
+    "-------------------------\r\n--{0}\r\n> -- quoted\r\n".format(i)
+    for i in xrange(2000))
+
+
+def patch_review(parts):
+    message = ("Content-Type: multipart/mixed; boundary=review\r\n\r\n"
+               "--review\r\n")
+    for i in xrange(parts):
+        message += ("Content-Type: text/plain\r\n\r\n{0}\r\n"
+                    "--review\r\n").format(NOISE)
+    return message[:-2] + "--\r\n"
+
+
+def count_tokens(string):
+    created = [0]
+    boundary = scanner.Boundary
+
+    class CountingBoundary(boundary):
+        __slots__ = ()
+
+        def __init__(self, *args, **kwargs):
+            created[0] += 1
+            boundary.__init__(self, *args, **kwargs)
+
+    scanner.Boundary = CountingBoundary
+    try:
+        tokens = scanner.tokenize(string)
+    finally:
+        scanner.Boundary = boundary
+    return len(tokens), created[0]
+
+
+def measure(fn, number=10):
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number * 1e3
+
+
+def main():
+    print "{0:<25} {1:>10} {2:>8} {3:>10} {4:>10}".format(
+        "message", "size, KB", "tokens", "boundaries", "ms")
+    for name, string in [('dashed-boundaries.eml', DASHED),
+                         ('patch review, 1 part', patch_review(1)),
+                         ('patch review, 10 parts', patch_review(10))]:
+        tokens, created = count_tokens(string)
+        print "{0:<25} {1:>10} {2:>8} {3:>10} {4:>10.2f}".format(
+            name, len(string) / 1024, tokens, created,
+            measure(lambda: scanner.tokenize(string)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""
+Time to build the message tree by scanning the message and by loading
+its structural index, and the size of the index.
+
+    $ python -m benchmarks.mime_index
+"""
+import timeit
+
+from flanker import mime
+from benchmarks import message_fixtures
+from benchmarks.mime_lazy import forwarded_chain
+
+
+def measure(fn, number=10):
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number * 1e3
+
+
+def main():
+    messages = [(name, string) for name, string in message_fixtures()
+                if len(string) > 20 * 1024]
+    messages.append(('forwarded chain, depth 50', forwarded_chain(50)))
+
+    print "{0:<30} {1:>10} {2:>10} {3:>10} {4:>10}".format(
+        "message", "size, KB", "index, B", "scan, ms", "index, ms")
+    for name, string in messages:
+        try:
+            blob = mime.dump_index(mime.from_string(string))
+        except mime.MimeError:
+            continue
+        scan = measure(lambda: mime.from_string(string))
+        load = measure(lambda: mime.from_string(string, index=blob))
+        print "{0:<30} {1:>10} {2:>10} {3:>10.2f} {4:>10.2f}".format(
+            name[:30], len(string) / 1024, len(blob), scan, load)
+
+
+if __name__ == '__main__':
+    main()
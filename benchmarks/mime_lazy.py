@@ -0,0 +1,57 @@
+"""
+Time to the first text part of a long chain of forwarded messages with
+attachments, with the full and the lazy message tree.
+
+    $ python -m benchmarks.mime_lazy
+"""
+import base64
+import random
+import timeit
+
+from flanker.mime import create
+
+
+def forwarded_chain(depth, attachment_size=50 * 1024):
+    rnd = random.Random(0)
+    message = ("From: a@example.com\r\nContent-Type: text/plain\r\n\r\n"
+               "the original message\r\n")
+    for i in xrange(depth):
+        attachment = base64.encodestring(
+            ''.join(chr(rnd.randint(0, 255)) for _ in xrange(attachment_size)))
+        message = (
+            "From: a@example.com\r\nSubject: Fwd\r\n"
+            "Content-Type: multipart/mixed; boundary=b{0}\r\n\r\n"
+            "--b{0}\r\nContent-Type: text/plain\r\n\r\nsee below\r\n"
+            "--b{0}\r\nContent-Type: image/png\r\n"
+            "Content-Transfer-Encoding: base64\r\n\r\n{1}\r\n"
+            "--b{0}\r\nContent-Type: message/rfc822\r\n\r\n{2}\r\n"
+            "--b{0}--\r\n").format(i, attachment, message)
+    return message
+
+
+def first_text(message):
+    for part in message.walk(with_self=True):
+        if part.content_type == 'text/plain':
+            return part.body
+
+
+def measure(fn, number=10):
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number * 1e3
+
+
+def main():
+    print "{0:>6} {1:>10} {2:>10} {3:>10} {4:>10}".format(
+        "depth", "size, KB", "full, ms", "lazy, ms", "lazy walk")
+    for depth in (1, 10, 50):
+        string = forwarded_chain(depth)
+        full = measure(lambda: first_text(create.from_string(string)))
+        lazy = measure(
+            lambda: first_text(create.from_string(string, lazy=True)))
+        walk = measure(lambda: list(
+            create.from_string(string, lazy=True).walk(with_self=True)))
+        print "{0:>6} {1:>10} {2:>10.2f} {3:>10.2f} {4:>10.2f}".format(
+            depth, len(string) / 1024, full, lazy, walk)
+
+
+if __name__ == '__main__':
+    main()
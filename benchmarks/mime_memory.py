@@ -0,0 +1,41 @@
+"""
+Memory taken by the parsed message tree per part, the message string
+itself is not counted.
+
+    $ python -m benchmarks.mime_memory
+"""
+from flanker.mime import create
+from flanker.mime.message.scanner import tokenize
+from benchmarks import message_fixtures, deep_sizeof
+
+
+def measure(string):
+    message = create.from_string(string)
+    parts = list(message.walk(with_self=True))
+    tree = deep_sizeof(message, exclude=[string, message._container.stream])
+    tokens = tokenize(string)
+    return len(parts), tree, len(tokens), deep_sizeof(tokens, exclude=[string])
+
+
+def main():
+    total_parts = total_tree = total_tokens = total_tokens_size = 0
+    print "{0:<40} {1:>6} {2:>10} {3:>7} {4:>11}".format(
+        "message", "parts", "bytes/part", "tokens", "bytes/token")
+    for name, string in message_fixtures():
+        try:
+            parts, tree, tokens, tokens_size = measure(string)
+        except Exception:
+            continue
+        total_parts += parts
+        total_tree += tree
+        total_tokens += tokens
+        total_tokens_size += tokens_size
+        print "{0:<40} {1:>6} {2:>10} {3:>7} {4:>11}".format(
+            name, parts, tree / parts, tokens, tokens_size / max(tokens, 1))
+    print "{0:<40} {1:>6} {2:>10} {3:>7} {4:>11}".format(
+        "total", total_parts, total_tree / total_parts,
+        total_tokens, total_tokens_size / max(total_tokens, 1))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,357 @@
+"""
+Parsing benchmark suite: from_string, headers, body decoding, walk,
+to_string of unchanged and changed messages, to_segments of changed
+messages, recover() and the standard library parser for reference, over
+the fixture messages and generated large ones (many parts, deep nesting,
+huge base64 attachment).
+
+    $ python -m benchmarks.mime_suite
+    $ python -m benchmarks.mime_suite --save baseline.json
+    $ python -m benchmarks.mime_suite --compare baseline.json
+
+For every message and operation it reports the best time of one run,
+the peak memory growth and the number of objects allocated and not
+freed by the run. The fixtures are reported as a total unless --verbose
+is given. Every operation runs on a freshly parsed message, the parsing
+is not timed unless it is the operation. Memory and objects are measured
+in a forked process (Unix only), so the runs do not affect each other:
+the peak is the growth of the resident set size (exact on Linux only)
+and the objects are the garbage collected objects (containers) that are
+still alive after the run, Python 2 has no way to count all allocations.
+
+In the comparison mode the results are compared with the saved ones and
+the exit status is 1 if any operation got slower than the threshold.
+"""
+import argparse
+import ctypes
+import ctypes.util
+import email
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import sys
+import time
+
+from flanker import mime
+from benchmarks import message_fixtures
+
+
+# seconds every operation is repeated for, setups included
+TIME_BUDGET = 0.2
+MIN_RUNS = 5
+MAX_RUNS = 1000
+
+# slowdowns below these are considered noise
+THRESHOLD = 0.1
+NOISE_MS = 0.05
+
+FIXTURES = 'fixtures'
+
+_LIBC = ctypes.CDLL(ctypes.util.find_library('c'))
+
+
+def many_parts(count=240):
+    # the scanner allows up to 500 traversal steps, two per part
+    parts = "".join(
+        "--bound\r\nContent-Type: text/plain\r\n\r\npart {0}\r\n".format(i)
+        for i in xrange(count))
+    return ("Subject: many parts\r\n"
+            "Content-Type: multipart/mixed; boundary=bound\r\n\r\n"
+            "{0}--bound--\r\n".format(parts))
+
+
+def deep_nesting(depth=60):
+    message = "Content-Type: text/plain\r\n\r\ninnermost\r\n"
+    for i in xrange(depth):
+        message = ("Content-Type: multipart/mixed; boundary=b{0}\r\n\r\n"
+                   "--b{0}\r\nContent-Type: text/plain\r\n\r\nlevel {0}\r\n"
+                   "--b{0}\r\n{1}\r\n--b{0}--\r\n").format(i, message)
+    return "Subject: deep nesting\r\n" + message
+
+
+def huge_base64(size=8 * 1024 * 1024):
+    # the seed keeps the message the same from run to run
+    rnd = random.Random(42)
+    data = "".join(chr(rnd.getrandbits(8)) for _ in xrange(size))
+    encoded = data.encode('base64').replace('\n', '\r\n')
+    return ("Subject: huge base64\r\n"
+            "Content-Type: multipart/mixed; boundary=bound\r\n\r\n"
+            "--bound\r\nContent-Type: text/plain\r\n\r\nsee attached\r\n"
+            "--bound\r\nContent-Type: application/octet-stream\r\n"
+            "Content-Transfer-Encoding: base64\r\n\r\n"
+            "{0}--bound--\r\n").format(encoded)
+
+
+SYNTHETIC = [('many-parts', many_parts),
+             ('deep-nesting', deep_nesting),
+             ('huge-base64', huge_base64)]
+
+
+def synthetic_messages():
+    return [(name, generate()) for name, generate in SYNTHETIC]
+
+
+def parsed(string):
+    return mime.from_string(string)
+
+
+def with_headers(string):
+    message = mime.from_string(string)
+    for part in message.walk(with_self=True):
+        part.headers
+    return message
+
+
+def changed(string):
+    message = mime.from_string(string)
+    message.headers['Subject'] = u'changed'
+    for part in message.walk():
+        if part.content_type.main == 'text':
+            part.body = part.body + u'\r\nchanged'
+            break
+    return message
+
+
+def touch_headers(message):
+    for part in message.walk(with_self=True):
+        part.headers.items()
+
+
+def decode_bodies(message):
+    for part in message.walk(with_self=True):
+        if part.content_type.is_singlepart():
+            part.body
+
+
+# operation name, setup and run functions, the setup result is passed
+# to the run function
+OPERATIONS = [
+    ('from_string', str, mime.from_string),
+    ('headers', parsed, touch_headers),
+    ('body', with_headers, decode_bodies),
+    ('walk', parsed, lambda m: list(m.walk(with_self=True))),
+    ('to_string', parsed, lambda m: m.to_string()),
+    ('to_string changed', changed, lambda m: m.to_string()),
+    ('to_segments changed', changed, lambda m: m.to_segments()),
+    ('recover', str, mime.recover),
+    ('stdlib', str, email.message_from_string),
+]
+
+
+def measure_time(setup, run, string):
+    """Returns the best time of one run in milliseconds"""
+    best = None
+    runs = 0
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        deadline = time.time() + TIME_BUDGET
+        while runs < MIN_RUNS or (time.time() < deadline and
+                                  runs < MAX_RUNS):
+            arg = setup(string)
+            started = time.time()
+            run(arg)
+            elapsed = time.time() - started
+            best = elapsed if best is None else min(best, elapsed)
+            runs += 1
+    finally:
+        if enabled:
+            gc.enable()
+    return best * 1e3
+
+
+def measure_memory(setup, run, string):
+    """Returns the peak memory growth in KB and the number of objects
+    left by the run, which is done in a forked process"""
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read)
+        try:
+            arg = setup(string)
+            gc.collect()
+            gc.disable()
+            start_rss = _reset_peak()
+            start_objects = gc.get_count()[0]
+            run(arg)
+            result = [_peak_rss() - start_rss,
+                      gc.get_count()[0] - start_objects]
+        except Exception:
+            result = None
+        os.write(write, json.dumps(result))
+        os._exit(0)
+
+    os.close(write)
+    with os.fdopen(read) as f:
+        result = json.loads(f.read())
+    os.waitpid(pid, 0)
+    return result
+
+
+def _reset_peak():
+    """Makes the current resident set size the peak one and returns it.
+    Memory freed by the process stays resident and would be reused
+    unnoticed, so it is given back to the system first. The reset works
+    on Linux only, elsewhere the peak of the process is returned, so the
+    growth is underestimated"""
+    try:
+        _LIBC.malloc_trim(0)
+    except AttributeError:
+        pass
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except (IOError, OSError):
+        return _peak_rss()
+    return _proc_status('VmRSS')
+
+
+def _peak_rss():
+    try:
+        return _proc_status('VmHWM')
+    except (IOError, OSError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # bytes on mac os, kilobytes elsewhere
+        return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def _proc_status(field):
+    """Returns the field of /proc/self/status in KB"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    raise IOError("No {0} in /proc/self/status".format(field))
+
+
+def measure(string):
+    """Returns {operation: {'ms', 'peak_kb', 'objects'}} for the message,
+    operations that fail on it are left out"""
+    results = {}
+    for name, setup, run in OPERATIONS:
+        try:
+            ms = measure_time(setup, run, string)
+        except Exception:
+            # e.g. MimeError for the broken fixtures
+            continue
+        memory = measure_memory(setup, run, string)
+        peak_kb, objects = memory if memory else (None, None)
+        results[name] = {'ms': ms, 'peak_kb': peak_kb, 'objects': objects}
+    return results
+
+
+def run_suite(verbose=False):
+    """Returns {message: {operation: result}}, the results of the
+    fixtures are summed up unless `verbose`"""
+    results = {}
+    for name, string in message_fixtures():
+        measured = measure(string)
+        if verbose:
+            results[name] = measured
+        else:
+            _add_up(results.setdefault(FIXTURES, {}), measured)
+    for name, string in synthetic_messages():
+        results[name] = measure(string)
+    return results
+
+
+def _add_up(total, results):
+    for operation, result in results.iteritems():
+        summed = total.setdefault(
+            operation, {'ms': 0.0, 'peak_kb': 0, 'objects': 0})
+        summed['ms'] += result['ms']
+        summed['peak_kb'] = max(summed['peak_kb'], result['peak_kb'])
+        summed['objects'] += result['objects'] or 0
+
+
+def report(results, out=sys.stdout):
+    out.write("{0:<34} {1:<18} {2:>10} {3:>10} {4:>10}\n".format(
+        "message", "operation", "ms", "peak KB", "objects"))
+    for message, operation, result in _rows(results):
+        out.write("{0:<34} {1:<18} {2:>10.3f} {3:>10} {4:>10}\n".format(
+            message, operation, result['ms'], _or_dash(result['peak_kb']),
+            _or_dash(result['objects'])))
+
+
+def compare(results, baseline, threshold=THRESHOLD, out=sys.stdout):
+    """Reports the results next to the baseline ones, returns the number
+    of operations that got slower than the threshold"""
+    regressions = 0
+    out.write("{0:<34} {1:<18} {2:>10} {3:>10} {4:>8} {5:>10}\n".format(
+        "message", "operation", "ms", "base ms", "change", "peak KB"))
+    for message, operation, result in _rows(results):
+        base = baseline.get(message, {}).get(operation)
+        if base is None:
+            change, flag = "new", ""
+        else:
+            delta = result['ms'] - base['ms']
+            ratio = delta / base['ms'] if base['ms'] else 0.0
+            change = "{0:+.1%}".format(ratio)
+            flag = ""
+            if ratio > threshold and delta > NOISE_MS:
+                flag = "  SLOWER"
+                regressions += 1
+        out.write("{0:<34} {1:<18} {2:>10.3f} {3:>10} {4:>8} {5:>10}{6}\n"
+                  .format(message, operation, result['ms'],
+                          "-" if base is None else
+                          "{0:.3f}".format(base['ms']),
+                          change, _or_dash(result['peak_kb']), flag))
+    return regressions
+
+
+def _rows(results):
+    order = [name for name, _, _ in OPERATIONS]
+    for message in sorted(results, key=_message_order):
+        for operation in order:
+            if operation in results[message]:
+                yield message, operation, results[message][operation]
+
+
+def _message_order(name):
+    synthetic = [n for n, _ in SYNTHETIC]
+    if name in synthetic:
+        return 1, synthetic.index(name), name
+    return 0, 0, name
+
+
+def _or_dash(value):
+    return "-" if value is None else value
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="MIME parsing benchmarks")
+    parser.add_argument("--save", metavar="PATH",
+                        help="save the results as the baseline")
+    parser.add_argument("--compare", metavar="PATH",
+                        help="compare the results with the saved baseline")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="slowdown reported as a regression, 0.1 is 10%%")
+    parser.add_argument("--verbose", action="store_true",
+                        help="report every fixture message separately")
+    args = parser.parse_args(args)
+    # the broken fixtures are logged about
+    logging.getLogger('flanker').addHandler(logging.NullHandler())
+
+    results = run_suite(args.verbose)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+    else:
+        report(results)
+        regressions = 0
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'python': platform.python_version(),
+                       'platform': platform.platform(),
+                       'results': results}, f, indent=1, sort_keys=True)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,39 @@
+"""
+Local-part validation time of the ESP grammar plugins.
+
+    $ python -m benchmarks.plugins
+"""
+import timeit
+
+from flanker.addresslib.plugins import (aol, gmail, google, hotmail, icloud,
+                                        yahoo)
+
+
+SAMPLES = [
+    (yahoo, ['john.smith_99', 'john_smith-news', 'j0hn..smith', '_john']),
+    (gmail, ['john.smith.99', 'johnsmith+news', 'john..smith', 'john_smith']),
+    (aol, ['john_smith.99', 'john.smith_jr', 'john._smith', '9john']),
+    (icloud, ['john.smith99', 'john_smith+news', 'john..smith', 'john-smith']),
+    (hotmail, ['john.smith-99', 'john_smith+news', 'john..smith', '.john']),
+    (google, ["john.o'smith", 'john-smith+news', 'j', 'john smith']),
+]
+
+
+def measure(fn, number=20000):
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number * 1e6
+
+
+def main():
+    print "{0:<10} {1:<20} {2:>6} {3:>8}".format(
+        "plugin", "localpart", "valid", "us")
+    for plugin, localparts in SAMPLES:
+        name = plugin.__name__.split('.')[-1]
+        for localpart in localparts:
+            valid = plugin.validate(localpart)
+            elapsed = measure(lambda: plugin.validate(localpart))
+            print "{0:<10} {1:<20} {2:>6} {3:>8.2f}".format(
+                name, localpart, str(valid), elapsed)
+
+
+if __name__ == '__main__':
+    main()
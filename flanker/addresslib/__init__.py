@@ -7,7 +7,8 @@ parser.py module for the implementation of the recursive descent parser
 used to parse email addresses and urls.
 
 To override the default DNS lookup library or MX Cache, use the
-set_dns_lookup and set_mx_cache methods. For more details, see the User Manual.
+set_dns_lookup and set_mx_cache methods. Custom grammar plugins for other
+ESPs are added with register_plugin. For more details, see the User Manual.
 '''
 import re
 
@@ -41,6 +42,16 @@ CUSTOM_GRAMMAR_LIST = [
     (GOOGLE_PATTERN, google),
 ]
 
+def register_plugin(pattern, plugin):
+    """
+    Registers the custom grammar plugin for the mail exchangers that match
+    the pattern. Patterns are tried in the order of registration, after the
+    built in ones.
+    """
+    # validate imports this package
+    from flanker.addresslib.validate import plugin_dispatcher
+    plugin_dispatcher.register(pattern, plugin)
+
 def set_dns_lookup(dlookup):
     global dns_lookup
     dns_lookup = dlookup
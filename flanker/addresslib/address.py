@@ -17,16 +17,27 @@ Public Functions in flanker.addresslib.address module:
       mode will fail at the first instance of invalid grammar, relaxed modes
       tries to recover and continue.
 
+    * parse_list_many(address_lists, strict=False, as_tuple=False,
+                      workers=None, ordered=True, chunksize=64)
+
+      Parse many address lists (e.g. header values) in a pool of worker
+      processes.
+
+    * enable_parse_cache(size=10000), disable_parse_cache()
+
+      Memoize the results of parse and parse_list in a LRU cache.
+
     * validate_address(addr_spec)
 
       Validates (parse, plus dns, mx check, and custom grammar) a single
       address spec. In the case of a valid address returns an EmailAddress
       object, otherwise returns None.
 
-    * validate_list(addr_list, as_tuple=False)
+    * validate_list(addr_list, as_tuple=False, concurrency=1)
 
       Validates an address list, and returns a tuple of parsed and unparsed
-      portions.
+      portions. The mail exchangers of the domains can be looked up
+      concurrently.
 
 When valid addresses are returned, they are returned as an instance of either
 EmailAddress or UrlAddress in flanker.addresslib.address.
@@ -36,12 +47,16 @@ See the parser.py module for implementation details of the parser.
 
 import time
 import flanker.addresslib.parser
+from copy import copy
+from functools import partial
 from flanker.addresslib.quote import smart_unquote, smart_quote
 import flanker.addresslib.validate
 
 from flanker.addresslib.parser import MAX_ADDRESS_LENGTH
+from flanker.cache import LRUCache
 from flanker.utils import is_pure_ascii
 from flanker.utils import metrics_wrapper
+from flanker.utils import pool_map
 from flanker.mime.message.headers.encoding import encode_string
 from flanker.mime.message.headers.encodedword import mime_to_unicode
 from urlparse import urlparse
@@ -74,25 +89,26 @@ def parse(address, addr_spec_only=False, metrics=False):
     """
     mtimes = {'parsing': 0}
 
+    bstart = time.time()
+    retval = _memoized(_parse, 'parse', address, addr_spec_only)
+    mtimes['parsing'] = time.time() - bstart
+    return retval, mtimes
+
+
+def _parse(address, addr_spec_only):
     parser = flanker.addresslib.parser._AddressParser(False)
 
     try:
         # addr-spec only
         if addr_spec_only:
-            bstart = time.time()
-            retval = parser.address_spec(address)
-            mtimes['parsing'] = time.time() - bstart
-            return retval, mtimes
+            return parser.address_spec(address)
 
         # full address
-        bstart = time.time()
-        retval = parser.address(address)
-        mtimes['parsing'] = time.time() - bstart
-        return retval, mtimes
+        return parser.address(address)
 
     # supress any exceptions and return None
     except flanker.addresslib.parser.ParserException:
-        return None, mtimes
+        return None
 
 
 @metrics_wrapper()
@@ -127,23 +143,15 @@ def parse_list(address_list, strict=False, as_tuple=False, metrics=False):
         [A <a@b>, D <d@e>, http://localhost]
     """
     mtimes = {'parsing': 0}
-    parser = flanker.addresslib.parser._AddressParser(strict)
 
     # if we have a list, transform it into a string first
     if isinstance(address_list, list):
         address_list = ', '.join(_normalize_address_list(address_list))
 
     # parse
-    try:
-        bstart = time.time()
-        if strict:
-            p = parser.address_list(address_list)
-            u = []
-        else:
-            p, u = parser.address_list(address_list)
-        mtimes['parsing'] = time.time() - bstart
-    except flanker.addresslib.parser.ParserException:
-        p, u = (AddressList(), [])
+    bstart = time.time()
+    p, u = _memoized(_parse_list, 'parse_list', address_list, strict)
+    mtimes['parsing'] = time.time() - bstart
 
     # return as tuple or just parsed addresses
     if as_tuple:
@@ -151,6 +159,107 @@ def parse_list(address_list, strict=False, as_tuple=False, metrics=False):
     return p, mtimes
 
 
+def _parse_list(address_list, strict):
+    parser = flanker.addresslib.parser._AddressParser(strict)
+
+    try:
+        if strict:
+            return parser.address_list(address_list), []
+        return parser.address_list(address_list)
+    except flanker.addresslib.parser.ParserException:
+        return AddressList(), []
+
+
+def enable_parse_cache(size=10000):
+    """
+    Enables the memoization of parse() and parse_list() results in a LRU
+    cache of `size` entries, or resizes the cache if it is enabled already.
+    Cached results are copied on every call, so they can be modified safely.
+
+    Examples:
+        >>> address.enable_parse_cache(size=50000)
+        >>> address.parse('John <john@smith.com>')
+        John <john@smith.com>
+        >>> address.parse_cache_stats()
+        {'hits': 0, 'misses': 1, 'evictions': 0, 'size': 1}
+    """
+    global _parse_cache
+    cache = _parse_cache
+    if cache is None:
+        _parse_cache = LRUCache(size)
+    else:
+        cache.resize(size)
+
+
+def disable_parse_cache():
+    """
+    Disables the memoization of parse() and parse_list() results and drops
+    the cached results.
+    """
+    global _parse_cache
+    _parse_cache = None
+
+
+def parse_cache_stats():
+    """
+    Returns the hits, misses, evictions and size of the parse cache, or None
+    if the cache is disabled.
+    """
+    cache = _parse_cache
+    if cache is not None:
+        return cache.stats()
+
+
+def _memoized(fn, name, string, flag):
+    cache = _parse_cache
+    if cache is None:
+        return fn(string, flag)
+
+    # str and unicode inputs parse to different types of values
+    key = (name, type(string), string, flag)
+    try:
+        result = cache.get(key, _MISSING)
+    except TypeError:
+        # unhashable input, let the parser deal with it
+        return fn(string, flag)
+
+    if result is _MISSING:
+        result = fn(string, flag)
+        cache.set(key, result)
+    return _copy_result(result)
+
+
+def _copy_result(result):
+    if isinstance(result, Address):
+        return copy(result)
+    if isinstance(result, tuple):
+        parsed, unparsed = result
+        return AddressList([copy(a) for a in parsed]), list(unparsed)
+    return result
+
+
+_parse_cache = None
+_MISSING = object()
+
+
+def parse_list_many(address_lists, strict=False, as_tuple=False,
+                    workers=None, ordered=True, chunksize=64):
+    """
+    Parses many address lists in a pool of `workers` processes, yields
+    the same results parse_list would return for every list.
+
+    In the ordered mode the results are yielded in the order of the lists,
+    otherwise (index, result) pairs are yielded as soon as they are ready.
+    Lists are sent to the workers in batches of `chunksize` lists.
+
+    Examples:
+        >>> list(address.parse_list_many(['A <a@b>', 'C <d@e>, f@g']))
+        [[A <a@b>], [C <d@e>, f@g]]
+    """
+    fn = partial(parse_list, strict=strict, as_tuple=as_tuple)
+    return pool_map(fn, address_lists, workers, ordered, chunksize)
+
+
 @metrics_wrapper()
 def validate_address(addr_spec, metrics=False):
     """
@@ -212,7 +321,7 @@ def validate_address(addr_spec, metrics=False):
 
 
 @metrics_wrapper()
-def validate_list(addr_list, as_tuple=False, metrics=False):
+def validate_list(addr_list, as_tuple=False, metrics=False, concurrency=1):
     """
     Validates an address list, and returns a tuple of parsed and unparsed
     portions.
@@ -221,6 +330,9 @@ def validate_list(addr_list, as_tuple=False, metrics=False):
     and unparsable protions. If requested, will also return parisng time
     metrics.
 
+    The mail exchanger of every domain in the list is looked up once, up to
+    `concurrency` domains are looked up at the same time.
+
     Examples:
         >>> address.validate_address_list('a@mailgun.com, c@mailgun.com')
         [a@mailgun.com, c@mailgun.com]
@@ -245,16 +357,19 @@ def validate_list(addr_list, as_tuple=False, metrics=False):
     plist = flanker.addresslib.address.AddressList()
     ulist = []
 
+    # lookup if the domains have mail exchangers
+    exchangers, mx_metrics = \
+        flanker.addresslib.validate.mail_exchanger_lookup_many(
+            [paddr.hostname for paddr in parsed_addresses],
+            concurrency=concurrency, metrics=True)
+    mtimes['mx_lookup'] += mx_metrics['mx_lookup']
+    mtimes['dns_lookup'] += mx_metrics['dns_lookup']
+    mtimes['mx_conn'] += mx_metrics['mx_conn']
+
     # make sure parsed list pass dns and esp grammar
     for paddr in parsed_addresses:
 
-        # lookup if this domain has a mail exchanger
-        exchanger, mx_metrics = \
-            flanker.addresslib.validate.mail_exchanger_lookup(paddr.hostname, metrics=True)
-        mtimes['mx_lookup'] += mx_metrics['mx_lookup']
-        mtimes['dns_lookup'] += mx_metrics['dns_lookup']
-        mtimes['mx_conn'] += mx_metrics['mx_conn']
-
+        exchanger = exchangers[paddr.hostname]
         if exchanger is None:
             ulist.append(paddr.full_spec())
             continue
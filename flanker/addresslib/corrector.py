@@ -7,14 +7,29 @@ The spelling corrector uses difflib which in turn uses the
 Ratcliff-Obershelp algorithm [1] to compute the similarity of two strings.
 This is a very fast an accurate algorithm for domain spelling correction.
 
-The (only) public method this module has is suggest(word), which given
-a domain, suggests an alternative or returns the original domain
-if no suggestion exists.
+The public method this module has is suggest(word), which given a domain,
+suggests an alternative or returns the original domain if no suggestion
+exists. It uses the built in list of the most common domains, a bigger
+dictionary can be loaded with DomainCorrector.from_file and installed with
+set_corrector:
+
+    >>> corrector.set_corrector(DomainCorrector.from_file('domains.txt'))
+
+Large dictionaries are indexed by the bigrams of the domains, so only the
+domains that share enough bigrams with the word to be as close as the best
+match are compared with difflib.
 
 [1] http://xlinux.nist.gov/dads/HTML/ratcliffObershelp.html
 """
 
 import difflib
+import math
+import string
+
+from array import array
+from collections import defaultdict
+
+from flanker.cache import LRUCache
 
 
 def suggest(word, cutoff=0.77):
@@ -22,13 +37,224 @@ def suggest(word, cutoff=0.77):
     Given a domain and a cutoff heuristic, suggest an alternative or return the
     original domain if no suggestion exists.
     """
-    if word in LOOKUP_TABLE:
-        return LOOKUP_TABLE[word]
+    return _corrector.suggest(word, cutoff)
+
+
+def set_corrector(corrector):
+    """
+    Replaces the corrector used by suggest, e.g. with one that uses a bigger
+    dictionary of domains.
+    """
+    global _corrector
+    _corrector = corrector
+
+
+class DomainCorrector(object):
+    """
+    Suggests the closest domain from a dictionary of domains with the same
+    scoring and cutoff as difflib.get_close_matches.
+
+    Dictionaries of up to `linear_limit` domains are scanned linearly,
+    bigger ones are indexed by bigrams. The domains that share all but two
+    bigrams per edit with the word, up to `max_edits` edits, are scored
+    first. The best of their scores tells how many bigrams a domain has to
+    share with the word to score as well, and these domains are scored
+    next, so the suggestions are the same as with the linear scan. A
+    higher `max_edits` scores more domains in the first pass and fewer in
+    the second one. The last `memo_size` suggestions are memoized.
+    """
+
+    def __init__(self, domains, lookup_table=None, linear_limit=1000,
+                 max_edits=2, memo_size=10000):
+        self.domains = []
+        seen = set()
+        for domain in domains:
+            if domain not in seen:
+                seen.add(domain)
+                self.domains.append(domain)
+
+        self.lookup_table = dict(lookup_table or {})
+        self.max_edits = max_edits
+        self.memo = LRUCache(memo_size)
+
+        self.index = None
+        if len(self.domains) > linear_limit:
+            index = defaultdict(lambda: array('i'))
+            lengths = defaultdict(lambda: array('i'))
+            self.signatures = array('L')
+            self.chars = array('L')
+            for i, domain in enumerate(self.domains):
+                grams = _bigrams(domain)
+                for gram in grams:
+                    index[gram].append(i)
+                lengths[len(domain)].append(i)
+                self.signatures.append(_signature(grams))
+                self.chars.append(_signature(domain))
+            self.index = dict(index)
+            self.lengths = dict(lengths)
+
+    @classmethod
+    def from_file(cls, path, lookup_table=None, **kwargs):
+        """
+        Loads the dictionary from a file with a domain per line, empty lines
+        and lines starting with # are ignored.
+        """
+        with open(path) as f:
+            domains = [line.strip().lower() for line in f]
+        domains = [d for d in domains if d and not d.startswith('#')]
+        return cls(domains, lookup_table, **kwargs)
+
+    def suggest(self, word, cutoff=0.77):
+        if word in self.lookup_table:
+            return self.lookup_table[word]
+
+        key = (word, cutoff)
+        guess = self.memo.get(key)
+        if guess is None:
+            if self.index is None:
+                guess = difflib.get_close_matches(
+                    word, self.domains, n=1, cutoff=cutoff)
+                guess = guess[0] if guess else word
+            else:
+                guess = self._search(word, cutoff)
+            self.memo.set(key, guess)
+        return guess
+
+    def _search(self, word, cutoff):
+        grams = _bigrams(word)
+        signature = _signature(grams)
+
+        # an edited character changes at most two bigrams of the word
+        edits = min(int(len(word) * (1 - cutoff)) + 1, self.max_edits)
+        near = self._candidates(
+            word, grams, signature, cutoff,
+            lambda length: max(len(grams) - 2 * edits, 1))
+        best = _closest(word, (self.domains[i] for i in near), cutoff)
+
+        # the domains that may score at least as well as the best one
+        floor = cutoff if best is None else max(cutoff, best[0])
+        floor -= _EPSILON
+        rest = self._candidates(
+            word, grams, signature, floor,
+            lambda length: _shared_bigrams(
+                len(word), len(grams), length, floor))
+        best = _closest(word, (self.domains[i] for i in rest
+                               if i not in near), cutoff, best)
+        return word if best is None else best[1]
+
+    def _candidates(self, word, grams, signature, cutoff, required):
+        """
+        Returns the ids of the domains that may score at least `cutoff`:
+        the domains of the right length that share at least
+        required(len(domain)) bigrams with the word and not too few chars.
+        """
+        size = len(word)
+        # the same bound as SequenceMatcher.real_quick_ratio
+        lengths = [l for l in self.lengths
+                   if 2.0 * min(l, size) >= cutoff * (l + size)]
+        if not lengths:
+            return set()
+
+        # the signatures can only overcount the shared bigrams, unless
+        # bigrams of the word itself collide
+        collisions = len(grams) - _popcount(signature)
+        # the least number of matched chars and shared bigrams by length
+        bounds = dict((l, (cutoff * (l + size) / 2, required(l) - collisions))
+                      for l in lengths)
 
-    guess = difflib.get_close_matches(word, MOST_COMMON_DOMAINS, n=1, cutoff=cutoff)
-    if guess and len(guess) > 0:
-        return guess[0]
-    return word
+        least = min(required(l) for l in lengths)
+        ids = set()
+        if least < 1:
+            for l in lengths:
+                ids.update(self.lengths[l])
+        else:
+            # a domain that shares `least` bigrams with the word has to be
+            # in one of the len(grams) - least + 1 shortest postings
+            postings = sorted((self.index.get(g, ()) for g in grams),
+                              key=len)
+            for posting in postings[:len(grams) - least + 1]:
+                ids.update(posting)
+
+        chars = _signature(word)
+        domains, signatures, domain_chars = \
+            self.domains, self.signatures, self.chars
+        candidates = set()
+        for i in ids:
+            length = len(domains[i])
+            if length not in bounds:
+                continue
+            matched, shared = bounds[length]
+            # the chars one of them has and the other has not are unmatched
+            other = domain_chars[i]
+            if size - bin(chars & ~other).count('1') >= matched and \
+                    length - bin(other & ~chars).count('1') >= matched and \
+                    bin(signatures[i] & signature).count('1') >= shared:
+                candidates.add(i)
+        return candidates
+
+
+def _closest(word, domains, cutoff, best=None):
+    """
+    Returns (score, domain) of the domain get_close_matches would pick,
+    unless `best` is better.
+    """
+    s = difflib.SequenceMatcher()
+    s.set_seq2(word)
+    for domain in domains:
+        s.set_seq1(domain)
+        if s.real_quick_ratio() >= cutoff and s.quick_ratio() >= cutoff:
+            score = s.ratio()
+            if score >= cutoff and (best is None or (score, domain) > best):
+                best = score, domain
+    return best
+
+
+def _shared_bigrams(size, count, length, cutoff):
+    """
+    Returns how many of the `count` distinct bigrams of a word of `size`
+    chars a domain of `length` chars shares with the word at least, if
+    their ratio is at least `cutoff`.
+
+    The ratio is 2 * M / T, where M chars of the word and the domain are
+    matched in k blocks and T = size + length. The k - 1 gaps between the
+    blocks take at least a char each out of T - 2 * M unmatched ones, and a
+    block of n chars holds n - 1 bigrams. So at most size + 1 - (M - k)
+    of the word's bigrams are not in a block, and M - k >= 3 * M - T - 1.
+    """
+    total = size + length
+    matched = int(math.ceil(cutoff * total / 2))
+    return count - size - 2 + 3 * matched - total
+
+
+def _bigrams(word):
+    word = '^' + word + '$'
+    return set(word[i:i + 2] for i in xrange(len(word) - 1))
+
+
+def _signature(items):
+    """
+    Returns the bit set of the bigrams or chars, a bit may stand for a few
+    of them.
+    """
+    signature = 0
+    for item in items:
+        signature |= 1 << (_BITS.get(item, hash(item)) % _SIGNATURE_BITS)
+    return signature
+
+
+def _popcount(n):
+    return bin(n).count('1')
+
+
+# the signatures are stored as C longs, 32 or 64 bits wide
+_SIGNATURE_BITS = array('L').itemsize * 8
+
+# the chars of the domains get bits of their own (on 64 bit platforms)
+_BITS = dict((c, i) for i, c in
+             enumerate(string.ascii_lowercase + string.digits + '.-'))
+
+# scores that differ by a rounding error are the same
+_EPSILON = 1e-9
 
 
 MOST_COMMON_DOMAINS = [
@@ -93,3 +319,5 @@ LOOKUP_TABLE = {
     u'shaw':        u'shaw.ca',
     u'bell':        u'bell.net'
 }
+
+_corrector = DomainCorrector(MOST_COMMON_DOMAINS, LOOKUP_TABLE)
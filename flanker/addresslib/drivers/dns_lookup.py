@@ -1,5 +1,14 @@
 import collections
+import dns.exception
+import dns.name
+import dns.resolver
 import dnsq
+import threading
+
+from itertools import groupby
+from random import shuffle
+
+from flanker.cache import LRUCache
 
 
 class DNSLookup(collections.MutableMapping):
@@ -27,6 +36,115 @@ class DNSLookup(collections.MutableMapping):
         raise InvalidOperation('Length of MX records not supported.')
 
 
+class CachingDNSLookup(DNSLookup):
+    """
+    CachingDNSLookup has the same interface as DNSLookup, but caches the MX
+    hosts of the domains for the TTL of their records, limited to `max_ttl`
+    seconds. Failed lookups (NXDOMAIN, SERVFAIL, timeouts) are cached for
+    `negative_ttl` seconds.
+
+    Concurrent lookups of the same domain wait for a single query. Every
+    lookup returns its own copy of the hosts list. Every query times out
+    after `timeout` seconds per name server and `lifetime` seconds in
+    total, and failed queries are retried `retries` times.
+
+    >> flanker.addresslib.set_dns_lookup(CachingDNSLookup(negative_ttl=30))
+    """
+
+    OUTCOMES = ('noerror', 'nodata', 'nxdomain', 'servfail', 'timeout',
+                'error')
+
+    def __init__(self, size=10000, max_ttl=3600, negative_ttl=60,
+                 timeout=2.0, lifetime=4.0, retries=1, resolver=None):
+        if resolver is None:
+            resolver = dns.resolver.Resolver()
+            resolver.timeout = timeout
+            resolver.lifetime = lifetime
+        self.resolver = resolver
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.retries = retries
+        self.cache = LRUCache(size)
+        self.counters = dict.fromkeys(
+            self.OUTCOMES + ('hits', 'coalesced'), 0)
+        self._lock = threading.Lock()
+        self._queries = {}
+
+    def __getitem__(self, key):
+        with self._lock:
+            hosts = self.cache.get(key)
+            if hosts is not None:
+                self.counters['hits'] += 1
+                return list(hosts)
+            query = self._queries.get(key)
+            owner = query is None
+            if owner:
+                query = self._queries[key] = _Query()
+            else:
+                self.counters['coalesced'] += 1
+
+        if not owner:
+            query.done.wait()
+            return list(query.hosts)
+
+        try:
+            query.hosts = self._resolve(key)
+        finally:
+            with self._lock:
+                del self._queries[key]
+            query.done.set()
+        return list(query.hosts)
+
+    def stats(self):
+        """Returns the number of lookups by outcome, cache hits and
+        lookups that waited for the same query"""
+        with self._lock:
+            return dict(self.counters)
+
+    def _resolve(self, name):
+        for _ in xrange(self.retries + 1):
+            outcome, hosts, ttl = self._query(name)
+            if outcome not in ('servfail', 'timeout'):
+                break
+
+        with self._lock:
+            self.counters[outcome] += 1
+            self.cache.set(name, hosts, ttl)
+        return hosts
+
+    def _query(self, name):
+        try:
+            answer = self.resolver.query(name, 'MX')
+        except dns.resolver.NoAnswer:
+            # no MX records, fallback to A records
+            return 'nodata', [name.rstrip('.')], self.negative_ttl
+        except dns.resolver.NXDOMAIN:
+            return 'nxdomain', [], self.negative_ttl
+        except dns.resolver.NoNameservers:
+            return 'servfail', [], self.negative_ttl
+        except dns.exception.Timeout:
+            return 'timeout', [], self.negative_ttl
+        except Exception:
+            return 'error', [], self.negative_ttl
+
+        # sorted by priority, randomized within the same priority,
+        # without the records resolvers make up for missing domains
+        hosts = []
+        bogus = 'your-dns-needs-immediate-attention.' + name.rstrip('.')
+        records = sorted(answer, key=lambda r: r.preference)
+        for _, group in groupby(records, lambda r: r.preference):
+            group = [r.exchange.to_text().strip('.') for r in group]
+            shuffle(group)
+            hosts.extend(h for h in group if h and h != bogus)
+        return 'noerror', hosts, min(answer.rrset.ttl, self.max_ttl)
+
+
+class _Query(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.hosts = []
+
+
 class InvalidOperation(Exception):
     def __init__(self, reason):
         self.reason = reason
@@ -1,13 +1,30 @@
 import collections
 import redis
 
+from itertools import islice
+
+
 class RedisCache(collections.MutableMapping):
-    "RedisCache has the same interface as a dict, but talks to a redis server"
+    """
+    RedisCache has the same interface as a dict, but talks to a redis server.
 
-    def __init__(self, host='localhost', port=6379, prefix='mxr:', ttl=604800):
+    Caches can share a redis.ConnectionPool, otherwise every cache creates
+    its own pool. A redis server that does not respond within the socket
+    timeouts (in seconds) is treated as a cache miss.
+    """
+
+    def __init__(self, host='localhost', port=6379, prefix='mxr:', ttl=604800,
+                 connection_pool=None, socket_timeout=0.5,
+                 socket_connect_timeout=0.5, scan_count=1000):
         self.prefix = prefix
         self.ttl = ttl
-        self.r = redis.StrictRedis(host=host, port=port, db=0)
+        self.scan_count = scan_count
+        if connection_pool is None:
+            connection_pool = redis.ConnectionPool(
+                host=host, port=port, db=0,
+                socket_timeout=socket_timeout,
+                socket_connect_timeout=socket_connect_timeout)
+        self.r = redis.StrictRedis(connection_pool=connection_pool)
 
     def __getitem__(self, key):
         try:
@@ -21,24 +38,61 @@ class RedisCache(collections.MutableMapping):
         except:
             return None
 
+    def get_many(self, keys):
+        """
+        Returns a dict with the values of the keys found in the cache,
+        fetched in a single round trip.
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+        try:
+            values = self.r.mget([self.__keytransform__(k) for k in keys])
+        except:
+            return {}
+        return dict((k, v) for k, v in zip(keys, values) if v is not None)
+
+    def set_many(self, mapping):
+        """
+        Stores all the items of the mapping in a single round trip.
+        """
+        if not mapping:
+            return
+        try:
+            pipe = self.r.pipeline(transaction=False)
+            for key, value in mapping.iteritems():
+                pipe.setex(self.__keytransform__(key), self.ttl, value)
+            pipe.execute()
+        except:
+            return None
+
     def __delitem__(self, key):
         self.r.delete(self.__keytransform__(key))
 
     def __iter__(self):
-        try:
-            return self.__value_generator__(self.r.keys(self.prefix + '*'))
-        except:
-            return iter([])
+        return self.__value_generator__(self.__scan_keys__())
 
     def __len__(self):
         try:
-            return len(self.r.keys(self.__keytransform__('*')))
+            return sum(1 for _ in self.__scan_keys__())
         except:
             return 0
 
     def __keytransform__(self, key):
         return ''.join([self.prefix, str(key)])
 
+    def __scan_keys__(self):
+        # unlike KEYS, SCAN does not block the server on a large keyspace
+        return self.r.scan_iter(self.__keytransform__('*'), self.scan_count)
+
     def __value_generator__(self, keys):
-        for key in keys:
-            yield self.r.get(key)
+        try:
+            while True:
+                batch = list(islice(keys, self.scan_count))
+                if not batch:
+                    return
+                for value in self.r.mget(batch):
+                    if value is not None:
+                        yield value
+        except redis.RedisError:
+            return
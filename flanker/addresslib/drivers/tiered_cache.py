@@ -0,0 +1,85 @@
+import collections
+
+from flanker.addresslib.drivers.redis_driver import RedisCache
+from flanker.cache import LRUCache
+
+
+class TieredCache(collections.MutableMapping):
+    """
+    TieredCache has the same interface as a dict. It keeps the recently used
+    items in a bounded in-process LRU cache in front of another cache,
+    RedisCache by default.
+
+    The local items expire after `ttl` seconds, the domains cached as having
+    no mail exchanger (the 'False' value) after `negative_ttl` seconds.
+
+    >> flanker.addresslib.set_mx_cache(TieredCache(RedisCache(), size=10000))
+    """
+
+    def __init__(self, backend=None, size=10000, ttl=300, negative_ttl=60):
+        self.backend = backend if backend is not None else RedisCache()
+        self.negative_ttl = negative_ttl
+        self.local = LRUCache(size, ttl)
+
+    def __getitem__(self, key):
+        value = self.local.get(key)
+        if value is None:
+            value = self.backend[key]
+            if value is not None:
+                self._set_local(key, value)
+        return value
+
+    def __setitem__(self, key, value):
+        self.backend[key] = value
+        self._set_local(key, value)
+
+    def __delitem__(self, key):
+        self.local.delete(key)
+        del self.backend[key]
+
+    def __iter__(self):
+        return iter(self.backend)
+
+    def __len__(self):
+        return len(self.backend)
+
+    def get_many(self, keys):
+        values = {}
+        missing = []
+        for key in keys:
+            value = self.local.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                values[key] = value
+
+        if missing:
+            if hasattr(self.backend, 'get_many'):
+                found = self.backend.get_many(missing)
+            else:
+                found = dict((k, self.backend[k]) for k in missing)
+            for key, value in found.iteritems():
+                if value is not None:
+                    self._set_local(key, value)
+                    values[key] = value
+
+        return values
+
+    def set_many(self, mapping):
+        if hasattr(self.backend, 'set_many'):
+            self.backend.set_many(mapping)
+        else:
+            for key, value in mapping.iteritems():
+                self.backend[key] = value
+        for key, value in mapping.iteritems():
+            self._set_local(key, value)
+
+    def stats(self):
+        """Returns the hits, misses and evictions of the local cache"""
+        return self.local.stats()
+
+    def _set_local(self, key, value):
+        if value == 'False':
+            self.local.set(key, value, self.negative_ttl)
+        else:
+            self.local.set(key, value)
@@ -75,6 +75,8 @@ from flanker.addresslib.tokenizer import UNI_QSTR
 from flanker.addresslib.tokenizer import DOT_ATOM
 from flanker.addresslib.tokenizer import QSTRING
 from flanker.addresslib.tokenizer import URL
+from flanker.addresslib.tokenizer import FAST_ADDRESS
+from flanker.addresslib.tokenizer import FAST_ADDR_SPEC
 
 from flanker.mime.message.headers.encoding import encode_string
 
@@ -167,6 +169,12 @@ class _AddressParser(object):
             raise ParserException('Stream length exceeds maximum allowable ' + \
                 'address length of ' + str(MAX_ADDRESS_LENGTH) + '.')
 
+        # fast path for a plain addr-spec
+        match = FAST_ADDR_SPEC.match(stream)
+        if match:
+            return flanker.addresslib.address.EmailAddress(
+                cleanup_email(match.group('addr_spec')))
+
         self.stream = TokenStream(stream)
 
         addr = self._addr_spec()
@@ -319,8 +327,14 @@ class _AddressParser(object):
         """
         start_pos = self.stream.position
 
-        addr = self._name_addr_rfc() or self._name_addr_lax() or \
-            self._addr_spec() or self._url()
+        # the common forms are matched at once, they give the same results
+        # as the full grammar below
+        match = FAST_ADDRESS.match(self.stream.stream, start_pos)
+        if match:
+            addr = self._fast_address(match)
+        else:
+            addr = self._name_addr_rfc() or self._name_addr_lax() or \
+                self._addr_spec() or self._url()
 
         # if email address, check that it passes post processing checks
         if addr and isinstance(addr, flanker.addresslib.address.EmailAddress):
@@ -331,6 +345,25 @@ class _AddressParser(object):
 
         return addr
 
+    def _fast_address(self, match):
+        """
+        Grammar: fast-address -> [ display-name-rfc ] angle-addr-rfc
+                                 | addr-spec
+        """
+        self.stream.position = match.end()
+
+        aspec = match.group('addr_spec')
+        if aspec:
+            return flanker.addresslib.address.EmailAddress(
+                cleanup_email(aspec))
+
+        aaddr = cleanup_email(match.group('angle_addr'))
+        dname = cleanup_display_name(match.group('name') or '')
+        if dname:
+            return flanker.addresslib.address.EmailAddress(aaddr,
+                                                           parsed_name=dname)
+        return flanker.addresslib.address.EmailAddress(aaddr)
+
     def _url(self):
         """
         Grammar: url -> url
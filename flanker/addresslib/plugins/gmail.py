@@ -28,24 +28,14 @@
         dot              ->      .
 '''
 import re
-from flanker.addresslib.tokenizer import TokenStream
-from flanker.addresslib.tokenizer import ATOM
 
 
-GMAIL_BASE = re.compile(r'''
-                        [A-Za-z0-9\.]+
-                        ''', re.MULTILINE | re.VERBOSE)
-
-ALPHANUM   = re.compile(r'''
-                        [A-Za-z0-9]+
-                        ''', re.MULTILINE | re.VERBOSE)
-
-PLUS       = re.compile(r'''
-                        [\+]
-                        ''', re.MULTILINE | re.VERBOSE)
-DOT        = re.compile(r'''
-                        [\.]
-                        ''', re.MULTILINE | re.VERBOSE)
+# Grammar: local-part -> alphanum { [ dot ] alphanum }, tags are not checked
+GMAIL = re.compile(r'''
+                   [A-Za-z0-9]+
+                   (?:\.[A-Za-z0-9]+)*
+                   \Z
+                   ''', re.VERBOSE)
 
 
 def validate(localpart):
@@ -53,56 +43,12 @@ def validate(localpart):
     if not localpart:
         return False
 
-    lparts = localpart.split('+')
-    real_localpart = lparts[0]
-    stripped_localpart = real_localpart.replace('.', '')
+    real_localpart = localpart.split('+', 1)[0]
 
-    # length check
-    l = len(stripped_localpart)
+    # length check, dots are ignored
+    l = len(real_localpart) - real_localpart.count('.')
     if l < 6 or l > 30:
         return False
 
-   # must start with letter or num
-    if ALPHANUM.match(real_localpart[0]) is None:
-        return False
-    # must end with letter or num
-    if ALPHANUM.match(real_localpart[-1]) is None:
-        return False
     # grammar check
-    return _validate(real_localpart)
-
-
-def _validate(localpart):
-    stream = TokenStream(localpart)
-
-    while True:
-        # get alphanumeric portion
-        mpart = stream.get_token(ALPHANUM)
-        if mpart is None:
-            return False
-        # get optional dot, must be followed by more alphanumerics
-        mpart = stream.get_token(DOT)
-        if mpart is None:
-            break
-
-    # optional tags
-    tgs = _tags(stream)
-
-    if not stream.end_of_stream():
-        return False
-
-    return True
-
-
-def _tags(stream):
-    while True:
-        # plus sign
-        pls = stream.get_token(PLUS)
-
-        # optional atom
-        if pls:
-            stream.get_token(ATOM)
-        else:
-            break
-
-    return True
+    return GMAIL.match(real_localpart) is not None
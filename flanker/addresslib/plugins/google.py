@@ -28,37 +28,21 @@
 
 '''
 import re
-from flanker.addresslib.tokenizer import TokenStream
-from flanker.addresslib.tokenizer import ATOM
 
 
-GOOGLE_BASE  = re.compile(r'''
-                        [A-Za-z0-9_\-'\.]+
-                        ''', re.MULTILINE | re.VERBOSE)
+# a single character local-part
+GOOGLE_SHORT = re.compile(r'''
+                          [A-Za-z0-9_']
+                          ''', re.VERBOSE)
 
-ALPHANUM    = re.compile(r'''
-                        [A-Za-z0-9]+
-                        ''', re.MULTILINE | re.VERBOSE)
-
-UNDERSCORE  = re.compile(r'''
-                        [_]+
-                        ''', re.MULTILINE | re.VERBOSE)
-
-APOSTROPHES = re.compile(r'''
-                        [']+
-                        ''', re.MULTILINE | re.VERBOSE)
-
-DASH        = re.compile(r'''
-                        [-]+
-                        ''', re.MULTILINE | re.VERBOSE)
-
-DOTS        = re.compile(r'''
-                        [.]+
-                        ''', re.MULTILINE | re.VERBOSE)
-
-PLUS        = re.compile(r'''
-                         [\+]+
-                         ''', re.MULTILINE | re.VERBOSE)
+# Grammar: local-part -> { alphanum | underscore | dash | apostrophe | dot },
+# must start and end with alphanum, underscore, dash or apostrophe,
+# tags are not checked
+GOOGLE       = re.compile(r'''
+                          [A-Za-z0-9_'\-]
+                          (?:[A-Za-z0-9_'\-.]*[A-Za-z0-9_'\-])?
+                          \Z
+                          ''', re.VERBOSE)
 
 
 def validate(localpart):
@@ -66,63 +50,16 @@ def validate(localpart):
     if not localpart:
         return False
 
-    lparts = localpart.split('+')
-    real_localpart = lparts[0]
+    real_localpart = localpart.split('+', 1)[0]
 
     # length check
     l = len(real_localpart)
-    if l < 0 or l > 64:
+    if l > 64:
         return False
 
     # if only one character, must be alphanum, underscore (_), or apostrophe (')
     if len(localpart) == 1 or l == 1:
-        if ALPHANUM.match(localpart) or UNDERSCORE.match(localpart) or \
-            APOSTROPHES.match(localpart):
-            return True
-        return False
-
-    # must start with: alphanum, underscore (_), dash (-), or apostrophes(')
-    if len(real_localpart) > 0:
-        if not ALPHANUM.match(real_localpart[0]) and not UNDERSCORE.match(real_localpart[0]) \
-            and not DASH.match(real_localpart[0]) and not APOSTROPHES.match(real_localpart[0]):
-            return False
-    else:
-        return False
-
-    # must end with: alphanum, underscore(_), dash(-), or apostrophes(')
-    if not ALPHANUM.match(real_localpart[-1]) and not UNDERSCORE.match(real_localpart[-1]) \
-        and not DASH.match(real_localpart[-1]) and not APOSTROPHES.match(real_localpart[-1]):
-        return False
+        return GOOGLE_SHORT.match(localpart) is not None
 
     # grammar check
-    return _validate(real_localpart)
-
-def _validate(localpart):
-    stream = TokenStream(localpart)
-
-    # get the google base
-    mpart = stream.get_token(GOOGLE_BASE)
-    if mpart is None:
-        return False
-
-    # optional tags
-    tgs = _tags(stream)
-
-    if not stream.end_of_stream():
-        return False
-
-    return True
-
-
-def _tags(stream):
-    while True:
-        # plus sign
-        pls = stream.get_token(PLUS)
-
-        # optional atom
-        if pls:
-            stream.get_token(ATOM)
-        else:
-            break
-
-    return True
+    return GOOGLE.match(real_localpart) is not None
@@ -30,27 +30,16 @@
 
 '''
 import re
-from flanker.addresslib.tokenizer import TokenStream
 
-HOTMAIL_PREFIX  = re.compile(r'''
-                            [A-Za-z0-9]+
-                            ''', re.MULTILINE | re.VERBOSE)
 
-HOTMAIL_BASE    = re.compile(r'''
-                            [A-Za-z0-9\.\-\_]+
-                            ''', re.MULTILINE | re.VERBOSE)
-
-HOTMAIL_SUFFIX  = re.compile(r'''
-                            [A-Za-z0-9\-\_]+
-                            ''', re.MULTILINE | re.VERBOSE)
-
-PLUS            = re.compile(r'''
-                            \+
-                            ''', re.MULTILINE | re.VERBOSE)
-
-PERIODS         = re.compile(r'''
-                            \.{2,}
-                            ''', re.MULTILINE | re.VERBOSE)
+# Grammar: local-part -> alphanum { alphanum | dot | hyphen | underscore }
+#                         [ plus tag ]
+# the base can not end with a dot and the tag is not checked
+HOTMAIL = re.compile(r'''
+                     (?P<base>[A-Za-z0-9](?:[A-Za-z0-9._\-]*[A-Za-z0-9_\-])?)
+                     (?:\+[^+]*)?
+                     \Z
+                     ''', re.VERBOSE)
 
 
 def validate(localpart):
@@ -58,58 +47,14 @@ def validate(localpart):
     if not localpart:
         return False
 
-    # remove tag if it exists
-    lparts = localpart.split('+')
-    real_localpart = lparts[0]
-
-    # length check
-    l = len(real_localpart)
-    if l < 1 or l > 64:
-        return False
-
-    # start can only be alphanumeric
-    if HOTMAIL_PREFIX.match(real_localpart[0]) is None:
-        return False
-
-    # can not end with dot
-    if HOTMAIL_SUFFIX.match(real_localpart[-1]) is None:
-        return False
-
-    # no more than one plus (+)
-    if localpart.count('+') > 1:
-        return False
-
     # no consecutive periods (..)
-    if PERIODS.search(localpart):
+    if '..' in localpart:
         return False
 
-    # grammar check
-    retval = _validate(real_localpart)
-    return retval
-
-
-def _validate(localpart):
-    stream = TokenStream(localpart)
-
-    # get the hotmail base
-    mpart = stream.get_token(HOTMAIL_BASE)
-    if mpart is None:
-        return False
-
-    # optional tags
-    tgs = _tags(stream)
-
-    if not stream.end_of_stream():
+    # grammar check, allows no more than one plus (+)
+    match = HOTMAIL.match(localpart)
+    if match is None:
         return False
 
-    return True
-
-
-def _tags(stream):
-    pls = stream.get_token(PLUS)
-    bse = stream.get_token(HOTMAIL_BASE)
-
-    if bse and pls is None:
-        return False
-
-    return True
+    # length check
+    return len(match.group('base')) <= 64
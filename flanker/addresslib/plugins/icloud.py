@@ -33,32 +33,15 @@
 
 '''
 import re
-from flanker.addresslib.tokenizer import TokenStream
 
-ALPHA          = re.compile(r'''
-                            [A-Za-z]+
-                            ''', re.MULTILINE | re.VERBOSE)
 
-ALPHANUM      = re.compile(r'''
-                           [A-Za-z0-9]+
-                           ''', re.MULTILINE | re.VERBOSE)
-
-
-ICLOUD_PREFIX = re.compile(r'''
-                           [A-Za-z]+
-                           ''', re.MULTILINE | re.VERBOSE)
-
-ICLOUD_BASE   = re.compile(r'''
-                           [A-Za-z0-9\+]+
-                           ''', re.MULTILINE | re.VERBOSE)
-
-DOT           = re.compile(r'''
-                           \.
-                           ''', re.MULTILINE | re.VERBOSE)
-
-UNDERSCORE    = re.compile(r'''
-                           \_
-                           ''', re.MULTILINE | re.VERBOSE)
+# Grammar: local-part -> alpha { [ dot | underscore ] ( alpha | num ) },
+# tags are not checked
+ICLOUD = re.compile(r'''
+                    [A-Za-z][A-Za-z0-9]*
+                    (?:[._][A-Za-z0-9]+)*
+                    \Z
+                    ''', re.VERBOSE)
 
 
 def validate(localpart):
@@ -66,8 +49,7 @@ def validate(localpart):
     if not localpart:
         return False
 
-    lparts = localpart.split('+')
-    real_localpart = lparts[0]
+    real_localpart = localpart.split('+', 1)[0]
 
     # length check
     l = len(real_localpart)
@@ -78,35 +60,5 @@ def validate(localpart):
     if localpart[-1] == '+':
         return False
 
-    # must start with letter
-    if ALPHA.match(real_localpart[0]) is None:
-        return False
-
-    # must end with letter or digit
-    if ALPHANUM.match(real_localpart[-1]) is None:
-        return False
-
-    # check grammar
-    return _validate(real_localpart)
-
-
-def _validate(localpart):
-    stream = TokenStream(localpart)
-
-    # localpart must start with alpha
-    alpa = stream.get_token(ICLOUD_PREFIX)
-    if alpa is None:
-        return False
-
-    while True:
-        # optional dot or underscore
-        stream.get_token(DOT) or stream.get_token(UNDERSCORE)
-
-        base = stream.get_token(ICLOUD_BASE)
-        if base is None:
-            break
-
-    if not stream.end_of_stream():
-        return False
-
-    return True
+    # grammar check
+    return ICLOUD.match(real_localpart) is not None
@@ -72,6 +72,58 @@ URL        = re.compile(r'''
                         [^\s<>{}|\^~\[\]`;,]+
                         ''', re.MULTILINE | re.VERBOSE | re.UNICODE)
 
+# Fast path for the common ASCII forms of a mailbox, followed by a delimiter
+# or the end of the stream: [ display-name ] < addr-spec > or addr-spec.
+# The display name words are relax-atoms or quoted strings, local parts and
+# domains are dot-atoms and only spaces and tabs are allowed around them.
+FAST_ADDRESS = re.compile(r'''
+                        [\ \t]*                                 # whitespace
+                        (?:
+                            (?P<name>                           # display name
+                                (?:"(?:[\ \t]*(?:[\x21\x23-\x5b\x5d-\x7e]
+                                               |\\[\x21-\x7e\t\ ]))*
+                                   [\ \t]*"
+                                |[\x21\x23-\x2b\x2d-\x3a\x3d\x3f-\x7e]+)
+                                (?:[\ \t]+
+                                   (?:"(?:[\ \t]*(?:[\x21\x23-\x5b\x5d-\x7e]
+                                                  |\\[\x21-\x7e\t\ ]))*
+                                      [\ \t]*"
+                                   |[\x21\x23-\x2b\x2d-\x3a\x3d\x3f-\x7e]+))*
+                                [\ \t]*
+                            )?
+                            <(?P<angle_addr>                    # angle-addr
+                                [A-Za-z0-9!#$%&'*+\-/=?^_`{|}~]+
+                                (?:\.[A-Za-z0-9!#$%&'*+\-/=?^_`{|}~]+)*
+                                @
+                                [A-Za-z0-9!#$%&'*+\-/=?^_`{|}~]+
+                                (?:\.[A-Za-z0-9!#$%&'*+\-/=?^_`{|}~]+)*
+                            )>
+                        |
+                            (?P<addr_spec>                      # addr-spec
+                                [A-Za-z0-9!#$%&'*+\-/=?^_`{|}~]+
+                                (?:\.[A-Za-z0-9!#$%&'*+\-/=?^_`{|}~]+)*
+                                @
+                                [A-Za-z0-9!#$%&'*+\-/=?^_`{|}~]+
+                                (?:\.[A-Za-z0-9!#$%&'*+\-/=?^_`{|}~]+)*
+                            )
+                        )
+                        [\ \t]*                                 # whitespace
+                        (?=[,;]|\Z)                             # delimiter
+                        ''', re.VERBOSE)
+
+FAST_ADDR_SPEC = re.compile(r'''
+                        [\ \t]*                                 # whitespace
+                        (?P<addr_spec>                          # addr-spec
+                            [A-Za-z0-9!#$%&'*+\-/=?^_`{|}~]+
+                            (?:\.[A-Za-z0-9!#$%&'*+\-/=?^_`{|}~]+)*
+                            @
+                            [A-Za-z0-9!#$%&'*+\-/=?^_`{|}~]+
+                            (?:\.[A-Za-z0-9!#$%&'*+\-/=?^_`{|}~]+)*
+                        )
+                        [\ \t]*                                 # whitespace
+                        \Z
+                        ''', re.VERBOSE)
+
 class TokenStream(object):
     """
     Represents the stream of tokens that the parser will consume. The token
@@ -28,21 +28,50 @@ Public Functions in flanker.addresslib.validate module:
 
       Looks up the mail exchanger for a given domain.
 
+    * mail_exchanger_lookup_many(domains, concurrency)
+
+      Looks up the mail exchangers for many domains concurrently.
+
+    * resolve_mail_exchanger(domain)
+
+      Looks up the mail exchanger for a given domain bypassing the cache.
+
     * connect_to_mail_exchanger(mx_hosts)
 
-      Attempts to connect to a given mail exchanger to see if it exists.
+      Attempts to connect to the given mail exchangers, with staggered
+      concurrent connections, to see if one of them exists.
 """
 
+import errno
 import re
 import redis
+import select
 import socket
+import threading
 import time
 import flanker.addresslib
 
+from itertools import groupby
+from multiprocessing.pool import ThreadPool
+
 from flanker.addresslib import corrector
+from flanker.cache import LRUCache
 from flanker.utils import metrics_wrapper
 
 
+SMTP_PORT = 25
+
+# seconds to wait for a connection to a single mail exchanger,
+# for all of them and before starting the next connection
+CONNECT_TIMEOUT = 1.0
+CONNECT_TOTAL_TIMEOUT = 3.0
+CONNECT_STAGGER = 0.25
+
+# reachability of the mail exchanger hosts
+MX_HOST_TTL = 300
+mx_host_cache = LRUCache(size=10000, ttl=MX_HOST_TTL)
+
+
 def suggest_alternate(addr_spec):
     """
     Given an addr-spec, suggests a alternate addr-spec if common spelling
@@ -96,14 +125,110 @@ def plugin_for_esp(mail_exchanger):
     email service provider is returned, otherwise None is returned.
 
     If you are adding the grammar for a email service provider, add the module
-    to the flanker.addresslib.plugins directory then update the
-    flanker.addresslib package to add it to the known list of custom grammars.
+    to the flanker.addresslib.plugins directory then register it with
+    flanker.addresslib.register_plugin.
     """
-    for grammar in flanker.addresslib.CUSTOM_GRAMMAR_LIST:
-        if grammar[0].match(mail_exchanger):
-            return grammar[1]
+    return plugin_dispatcher.plugin_for(mail_exchanger)
 
-    return None
+
+class PluginDispatcher(object):
+    """
+    Finds the plugin for a mail exchanger in a single pass over the patterns
+    of the built in plugins (CUSTOM_GRAMMAR_LIST) and of the registered
+    ones: consecutive patterns with the same flags are combined into one
+    alternation of named groups, so the first matching pattern still wins.
+    Up to `memo_size` results are memoized in a plain dict, which is cleared
+    when full or when a plugin is registered: a locked LRU costs more than
+    matching the combined patterns again.
+
+    Direct changes to CUSTOM_GRAMMAR_LIST are only picked up by reset().
+    """
+
+    def __init__(self, memo_size=10000):
+        self.memo = {}
+        self.memo_size = memo_size
+        self.plugins = []
+        self.version = 0
+        self._version = None
+        self._matchers = []
+        self._lock = threading.Lock()
+
+    def register(self, pattern, plugin):
+        """
+        Registers the plugin for the mail exchangers that match the pattern,
+        after the built in and the already registered plugins.
+        """
+        if isinstance(pattern, basestring):
+            pattern = re.compile(pattern)
+        with self._lock:
+            self.plugins.append((pattern, plugin))
+            self.version += 1
+
+    def reset(self):
+        """
+        Forgets the registered plugins and rereads CUSTOM_GRAMMAR_LIST.
+        """
+        with self._lock:
+            del self.plugins[:]
+            self.version += 1
+
+    def plugin_for(self, mail_exchanger):
+        if self._version != self.version:
+            self._combine()
+
+        plugin = self.memo.get(mail_exchanger, _MISSING)
+        if plugin is _MISSING:
+            plugin = self._match(mail_exchanger)
+            if len(self.memo) >= self.memo_size:
+                self.memo.clear()
+            self.memo[mail_exchanger] = plugin
+        return plugin
+
+    def _match(self, mail_exchanger):
+        for regex, plugin, names in self._matchers:
+            match = regex.match(mail_exchanger)
+            if match:
+                return names[match.lastgroup] if names else plugin
+        return None
+
+    def _combine(self):
+        with self._lock:
+            if self._version == self.version:
+                return
+
+            grammars = flanker.addresslib.CUSTOM_GRAMMAR_LIST + self.plugins
+            matchers = []
+            for _, run in groupby(grammars, key=_combine_key):
+                matchers.extend(_combine_patterns(list(run)))
+
+            self._matchers = matchers
+            self.memo.clear()
+            self._version = self.version
+
+
+def _combine_key(grammar):
+    pattern = grammar[0]
+    # numeric backreferences and conditional groups refer to the groups
+    # by their numbers, which change in the combined pattern
+    if _RE_GROUP_NUMBERS.search(pattern.pattern):
+        return object()
+    return pattern.flags
+
+
+def _combine_patterns(grammars):
+    if len(grammars) > 1:
+        names = {}
+        alternatives = []
+        for i, (pattern, plugin) in enumerate(grammars):
+            names['p{0}'.format(i)] = plugin
+            alternatives.append('(?P<p{0}>{1})'.format(i, pattern.pattern))
+        try:
+            regex = re.compile('|'.join(alternatives), grammars[0][0].flags)
+            return [(regex, None, names)]
+        except (re.error, AssertionError):
+            # clashing group names or too many groups, match one by one
+            pass
+    return [(pattern, plugin, None) for pattern, plugin in grammars]
 
 
 @metrics_wrapper()
@@ -123,6 +248,27 @@ def mail_exchanger_lookup(domain, metrics=False):
     if in_cache:
         return cache_value, mtimes
 
+    mail_exchanger, resolve_mtimes = resolve_mail_exchanger(domain,
+                                                            metrics=True)
+    mtimes['dns_lookup'] = resolve_mtimes['dns_lookup']
+    mtimes['mx_conn'] = resolve_mtimes['mx_conn']
+    if mail_exchanger is None:
+        return None, mtimes
+
+    # valid mx records, connected to mail exchanger, return True
+    mx_cache[domain] = mail_exchanger
+    return mail_exchanger, mtimes
+
+
+@metrics_wrapper()
+def resolve_mail_exchanger(domain, metrics=False):
+    """
+    Looks up the MX (or A) records of a domain and connects to them, returns
+    the mail exchanger that accepted the connection or None. Unlike
+    mail_exchanger_lookup, the cache is neither read nor written.
+    """
+    mtimes = {'mx_lookup': 0, 'dns_lookup': 0, 'mx_conn': 0}
+
     # dns lookup on domain
     bstart = time.time()
     mx_hosts = lookup_domain(domain)
@@ -139,14 +285,61 @@ def mail_exchanger_lookup(domain, metrics=False):
     bstart = time.time()
     mail_exchanger = connect_to_mail_exchanger(mx_hosts)
     mtimes['mx_conn'] = time.time() - bstart
-    if mail_exchanger is None:
-        return None, mtimes
-
-    # valid mx records, connected to mail exchanger, return True
-    mx_cache[domain] = mail_exchanger
     return mail_exchanger, mtimes
 
 
+@metrics_wrapper()
+def mail_exchanger_lookup_many(domains, concurrency=1, metrics=False):
+    """
+    Looks up the mail exchangers for many domains. Every domain is looked up
+    once and up to `concurrency` lookups (DNS queries and connections to the
+    mail exchangers) run at the same time in a pool of threads.
+
+    The cache is queried for all the domains in a single batch, only the
+    domains missing from the cache are looked up, and the mail exchangers
+    found are written back in a single batch too.
+
+    Returns a dict that maps the domains to their mail exchangers (None for
+    the domains without one). The metrics are summed over all the lookups.
+    """
+    mtimes = {'mx_lookup': 0, 'dns_lookup': 0, 'mx_conn': 0}
+
+    # look in cache for all the domains at once
+    bstart = time.time()
+    exchangers = lookup_exchangers_in_cache(set(domains))
+    mtimes['mx_lookup'] = time.time() - bstart
+
+    domains = list(set(domains) - set(exchangers))
+    if concurrency > 1 and len(domains) > 1:
+        pool = ThreadPool(min(concurrency, len(domains)))
+        try:
+            results = pool.map(_resolve_mail_exchanger_with_metrics, domains)
+        finally:
+            pool.terminate()
+            pool.join()
+    else:
+        results = map(_resolve_mail_exchanger_with_metrics, domains)
+
+    resolved = {}
+    for domain, (exchanger, mx_metrics) in zip(domains, results):
+        exchangers[domain] = exchanger
+        if exchanger is not None:
+            resolved[domain] = exchanger
+        for k, v in mx_metrics.iteritems():
+            mtimes[k] += v
+
+    # valid mx records, connected to mail exchangers
+    bstart = time.time()
+    store_exchangers_in_cache(resolved)
+    mtimes['mx_lookup'] += time.time() - bstart
+
+    return exchangers, mtimes
+
+
+def _resolve_mail_exchanger_with_metrics(domain):
+    return resolve_mail_exchanger(domain, metrics=True)
+
+
 def lookup_exchanger_in_cache(domain):
     """
     Uses a cache to store the results of the mail exchanger lookup to speed
@@ -167,6 +360,44 @@ def lookup_exchanger_in_cache(domain):
         return (True, lookup)
 
 
+def lookup_exchangers_in_cache(domains):
+    """
+    Batch version of lookup_exchanger_in_cache. Returns a dict that maps the
+    cached domains to their mail exchangers (None for the domains cached as
+    having no mail exchanger).
+
+    Caches that provide the get_many(keys) method, like the redis cache, are
+    queried in a single round trip, others are queried key by key.
+    """
+    mx_cache = flanker.addresslib.mx_cache
+
+    if hasattr(mx_cache, 'get_many'):
+        lookups = mx_cache.get_many(domains)
+    else:
+        lookups = dict((domain, mx_cache[domain]) for domain in domains)
+
+    return dict((domain, None if lookup == 'False' else lookup)
+                for domain, lookup in lookups.iteritems()
+                if lookup is not None)
+
+
+def store_exchangers_in_cache(exchangers):
+    """
+    Writes the dict of domains and their mail exchangers to the cache. Caches
+    that provide the set_many(mapping) method, like the redis cache, are
+    written in a single round trip, others are written key by key.
+    """
+    if not exchangers:
+        return
+    mx_cache = flanker.addresslib.mx_cache
+
+    if hasattr(mx_cache, 'set_many'):
+        mx_cache.set_many(exchangers)
+    else:
+        for domain, exchanger in exchangers.iteritems():
+            mx_cache[domain] = exchanger
+
+
 def lookup_domain(domain):
     """
     The dnspython package is used for dns lookups. The dnspython package uses
@@ -187,22 +418,113 @@ def lookup_domain(domain):
     return mx_hosts
 
 
-def connect_to_mail_exchanger(mx_hosts):
+def connect_to_mail_exchanger(mx_hosts, timeout=None, total_timeout=None,
+                              stagger=None):
     """
-    Given a list of MX hosts, attempts to connect to at least one on port 25.
-    Returns the mail exchanger it was able to connect to or None.
+    Given a list of MX hosts, attempts to connect to at least one on the SMTP
+    port. Returns the mail exchanger it was able to connect to or None.
+
+    The reachability of the hosts is cached for MX_HOST_TTL seconds, the
+    first host known to be up is returned right away and the hosts known to
+    be down are not probed again. The others are probed in their order, the
+    next one `stagger` seconds after the previous one or as soon as any
+    attempt in flight fails, and the first host that accepts the connection
+    wins. Every connection attempt times out after `timeout` seconds, all of
+    them after `total_timeout` seconds. The attempts are non-blocking sockets
+    waited for in the calling thread, the ones that lose are closed.
     """
+    timeout = CONNECT_TIMEOUT if timeout is None else timeout
+    total_timeout = CONNECT_TOTAL_TIMEOUT if total_timeout is None \
+        else total_timeout
+    stagger = CONNECT_STAGGER if stagger is None else stagger
+
+    hosts = []
     for host in mx_hosts:
-        try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.settimeout(1.0)
-            s.connect((host, 25))
-            s.close()
+        reachable = mx_host_cache.get(host)
+        if reachable is True:
             return host
-        except:
-            continue
+        if reachable is None:
+            hosts.append(host)
+    hosts.reverse()
+
+    deadline = time.time() + total_timeout
+    # socket -> (host, time the attempt times out at)
+    attempts = {}
+    start_next = time.time()
+    try:
+        while hosts or attempts:
+            now = time.time()
+            if now >= deadline:
+                return None
+
+            if hosts and now >= start_next:
+                host = hosts.pop()
+                sock = _start_probe(host)
+                if sock is None:
+                    mx_host_cache.set(host, False)
+                else:
+                    attempts[sock] = (host, now + timeout)
+                    # give the attempts in flight a head start
+                    start_next = now + stagger
+                continue
+
+            wake = min([deadline] + [t for _, t in attempts.itervalues()] +
+                       ([start_next] if hosts else []))
+            # failed connections are exceptional on windows
+            _, connected, failed = select.select(
+                [], list(attempts), list(attempts), max(wake - now, 0))
+
+            for sock in set(connected + failed):
+                host, _ = attempts.pop(sock)
+                error = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                sock.close()
+                mx_host_cache.set(host, not error)
+                if not error:
+                    return host
+                start_next = time.time()
+
+            now = time.time()
+            for sock, (host, expires) in attempts.items():
+                if now >= expires:
+                    del attempts[sock]
+                    sock.close()
+                    mx_host_cache.set(host, False)
+                    start_next = now
+        return None
+    finally:
+        for sock in attempts:
+            sock.close()
 
+
+def _start_probe(host):
+    """
+    Starts a non-blocking connection to the SMTP port of the host, returns
+    the socket or None if the connection failed right away.
+    """
+    sock = None
+    try:
+        family, socktype, proto, _, address = socket.getaddrinfo(
+            host, SMTP_PORT, 0, socket.SOCK_STREAM)[0]
+        sock = socket.socket(family, socktype, proto)
+        sock.setblocking(0)
+        if sock.connect_ex(address) in _CONNECT_IN_PROGRESS:
+            return sock
+    except (socket.error, IndexError):
+        pass
+    if sock is not None:
+        sock.close()
     return None
 
 
 ONE_WEEK = 604800
+
+_MISSING = object()
+
+# connect_ex results of the non-blocking connections that are not failed
+_CONNECT_IN_PROGRESS = (0, errno.EINPROGRESS, errno.EWOULDBLOCK)
+
+# may also match an escaped backslash followed by a digit, such a pattern
+# is then just not combined
+_RE_GROUP_NUMBERS = re.compile(r'\\[1-9]|\(\?\(')
+
+plugin_dispatcher = PluginDispatcher()
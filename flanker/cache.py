@@ -0,0 +1,79 @@
+"""
+In-process caches used by flanker.
+"""
+import threading
+import time
+
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """
+    Thread safe cache that keeps up to `size` most recently used items.
+    Items expire `ttl` seconds after they were stored (never if ttl is None),
+    the ttl can be overridden for every item.
+
+    >> cache = LRUCache(size=2, ttl=60)
+    >> cache.set('a', 1)
+    >> cache.get('a')
+    1
+    >> cache.stats()
+    {'hits': 1, 'misses': 0, 'evictions': 0, 'size': 1}
+    """
+
+    def __init__(self, size=1024, ttl=None):
+        self.size = size
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._items.pop(key, None)
+            if item is None or (item[1] is not None and
+                                item[1] <= time.time()):
+                self.misses += 1
+                return default
+            self._items[key] = item
+            self.hits += 1
+            return item[0]
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = (value, expires)
+            self._evict(self.size)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def resize(self, size):
+        with self._lock:
+            self.size = size
+            self._evict(size)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'size': len(self)}
+
+    def __contains__(self, key):
+        item = self._items.get(key)
+        return item is not None and (item[1] is None or item[1] > time.time())
+
+    def __len__(self):
+        return len(self._items)
+
+    def _evict(self, size):
+        while len(self._items) > max(size, 0):
+            self._items.popitem(last=False)
+            self.evictions += 1
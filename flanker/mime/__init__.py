@@ -35,6 +35,41 @@ Examples
 >> from flanker import mime
 >> msg = mime.from_string(message_string)
 
+# when only the top level headers are needed, the rest of the message
+# is not scanned, and the full parse later on does not parse them again
+>> block = mime.parse_headers(message_string)
+>> block.headers, block.content_type, block.body_start
+>> msg = mime.from_string(message_string, headers=block)
+
+# in the lazy mode the parts are scanned only when they are accessed,
+# so looking at the first part of a long forwarded chain is cheap
+>> msg = mime.from_string(message_string, lazy=True)
+>> for part in msg.walk():
+>>     if part.content_type == 'text/plain':
+>>         break
+
+# the structure of messages that are parsed many times can be stored
+# next to them, the message tree is then rebuilt without scanning
+>> blob = mime.dump_index(msg)
+>> msg = mime.from_string(message_string, index=blob)
+
+# the parsing stages can be timed to see where the time goes
+>> stats = mime.Aggregator()
+>> msg = mime.from_string(message_string, hook=stats)
+>> stats.dump()
+
+# messages can be fed in chunks as they arrive, the header sections are
+# reported as soon as they are complete
+>> scanner = mime.IncrementalScanner()
+>> for chunk in chunks:
+>>     for block in scanner.feed(chunk):
+>>         print block.content_type, block.headers
+>> msg = scanner.close()
+
+# big messages can be parsed straight from disk, the file is memory mapped
+# so only the parts that are actually accessed are read into memory
+>> msg = mime.from_file('/path/to/message.eml')
+
 # unicode multi-value dictionary with headers
 msg.headers
 
@@ -61,7 +96,12 @@ read more in package details.
 """
 from flanker.mime.message.errors import DecodingError, EncodingError, MimeError
 from flanker.mime import create
-from flanker.mime.create import from_string
+from flanker.mime.create import (from_string, from_file, from_buffer,
+                                 parse_headers)
 from flanker.mime.message.fallback.create import from_string as recover
+from flanker.mime.message.scanner import IncrementalScanner
+from flanker.mime.bulk import parse_many
+from flanker.mime.index import dump_index, load_index
+from flanker.mime.instrumentation import Aggregator
 from flanker.mime.message.utils import python_message_to_string
 from flanker.mime.message.headers.parametrized import fix_content_type
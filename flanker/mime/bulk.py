@@ -0,0 +1,98 @@
+"""Bulk parsing of many messages in a pool of worker processes.
+
+Full MimePart trees hold the message string and are not cheap to send
+between processes, so the workers return lightweight, picklable
+PartSummary trees instead: the content types, the decoded headers
+and the offsets of the parts in the original message.
+
+>> from flanker import mime
+>> for summary in mime.parse_many(messages, workers=8, chunksize=16):
+>>     print summary.content_type, summary.headers
+"""
+from flanker.mime.create import from_string
+from flanker.mime.message.errors import MimeError
+from flanker.utils import pool_map
+
+
+def parse_many(strings, workers=None, ordered=True, chunksize=1):
+    """
+    Parses the messages in a pool of `workers` processes and yields
+    a PartSummary for every message.
+
+    In the ordered mode the summaries are yielded in the order of the
+    messages, otherwise (index, summary) pairs are yielded as soon as they
+    are ready. Messages that can not be parsed yield the MimeError instead
+    of the summary, so one broken message does not fail the whole batch.
+    """
+    return pool_map(_summarize, strings, workers, ordered, chunksize)
+
+
+class PartSummary(object):
+    """
+    Picklable summary of a parsed message part:
+
+    * content_type - content type value, e.g. 'text/plain'
+    * params - content type parameters
+    * headers - list of (name, value) pairs, values are decoded to unicode,
+      parametrized headers are converted to (value, params) tuples
+    * start, end - position of the part in the message
+    * body_start - position of the part body in the message
+    * parts - summaries of the multipart children
+    * enclosed - summary of the enclosed message
+    """
+
+    def __init__(self, content_type, params, headers, start, end,
+                 body_start, parts=None, enclosed=None):
+        self.content_type = content_type
+        self.params = params
+        self.headers = headers
+        self.start = start
+        self.end = end
+        self.body_start = body_start
+        self.parts = parts or []
+        self.enclosed = enclosed
+
+    def walk(self, with_self=False):
+        if with_self:
+            yield self
+        for p in self.parts:
+            yield p
+            for x in p.walk():
+                yield x
+        if self.enclosed:
+            yield self.enclosed
+            for x in self.enclosed.walk():
+                yield x
+
+    def __repr__(self):
+        return "PartSummary({0}, {1}, {2})".format(
+            self.content_type, self.start, self.end)
+
+
+def summarize(part):
+    """Converts the parsed MimePart tree into a PartSummary tree"""
+    container = part._container
+    headers = [(name, _plain(value)) for name, value in part.headers.items()]
+    return PartSummary(
+        content_type=part.content_type.value,
+        params=dict(part.content_type.params),
+        headers=headers,
+        start=container.start,
+        end=container.end,
+        body_start=container._body_start,
+        parts=[summarize(p) for p in part.parts],
+        enclosed=summarize(part.enclosed) if part.enclosed else None)
+
+
+def _summarize(string):
+    try:
+        return summarize(from_string(string))
+    except MimeError as e:
+        return e
+
+
+def _plain(value):
+    # parametrized header values are tuple subclasses that pickle badly
+    if isinstance(value, tuple):
+        return tuple(value)
+    return value
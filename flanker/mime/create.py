@@ -1,5 +1,6 @@
 """ This package is a set of utilities and methods for building mime messages """
 
+import mmap
 import uuid
 from flanker.mime import DecodingError
 from flanker.mime.message import ContentType, utils
@@ -7,6 +8,7 @@ from flanker.mime.message.part import MimePart, Body, Part, adjust_content_type
 from flanker.mime.message import scanner
 from flanker.mime.message.headers.parametrized import fix_content_type
 from flanker.mime.message.headers import WithParams
+from flanker.mime.index import load_index
 
 
 def multipart(subtype):
@@ -79,8 +81,50 @@ def attachment(content_type, body, filename=None,
         charset, True)
 
 
-def from_string(string):
-    return scanner.scan(string)
+def from_string(string, headers=None, lazy=False, index=None, hook=None,
+                strict_index=True):
+    """Parses the message string, `headers` is the result of
+    parse_headers for the same string, so the headers are not parsed
+    again when the full message is needed after all. In the `lazy` mode
+    the parts of the message are scanned when they are first accessed.
+    `index` is the structural index of the message from dump_index, the
+    message tree is rebuilt from it without scanning the message.
+    If `strict_index` is False the index is checked against the length
+    and the ends of the message only, see flanker.mime.index. `hook`
+    records the durations and the counters of the parsing stages, e.g.
+    an instrumentation.Aggregator"""
+    if index is not None:
+        return load_index(index, string, hook, strict_index)
+    return scanner.scan(string, headers, lazy, hook)
+
+
+def parse_headers(string):
+    """Parses the top level headers of the message only, returns a
+    HeaderBlock with the headers, the content type and the position
+    where the body starts"""
+    return scanner.scan_headers(string)
+
+
+def from_file(path, lazy=False, index=None, hook=None, strict_index=True):
+    """Parses the message stored in the file without reading it into
+    memory, the file is memory mapped and the parts are read from the
+    mapping on demand"""
+    with open(path, 'rb') as f:
+        f.seek(0, 2)
+        if not f.tell():
+            return from_string('', index=index, hook=hook,
+                               strict_index=strict_index)
+        return from_buffer(
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), lazy, index,
+            hook, strict_index)
+
+
+def from_buffer(mapping, lazy=False, index=None, hook=None,
+                strict_index=True):
+    """Parses the message from a memory map (mmap.mmap object)"""
+    if index is not None:
+        return load_index(index, mapping, hook, strict_index)
+    return scanner.scan(mapping, lazy=lazy, hook=hook)
 
 
 def from_python(message):
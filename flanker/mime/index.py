@@ -0,0 +1,141 @@
+"""Structural index of a parsed message.
+
+Tokenizing is the most expensive step of parsing, so for messages that
+are parsed again and again the structure found by the scanner (the
+content types and the positions of the parts) can be dumped to a
+compact blob, stored next to the message and used to rebuild the
+message tree without scanning the message again:
+
+>> blob = mime.dump_index(mime.from_string(message_string))
+>> msg = mime.from_string(message_string, index=blob)
+
+The blob starts with a fixed header: the magic, the format version, the
+length of the message, the CRC32 checksum of the message and the CRC32
+checksum of its first and last 4 KB. By default the whole message is
+checked, so a changed message is noticed, but for a large
+message the check takes about as long as scanning it. With
+`strict_index=False` only the length and the ends of the message are
+checked, which costs the same for any message, but a change in the
+middle of a large message that keeps its length (e.g. a retyped header
+value or body bytes) goes unnoticed and the stale index is loaded. The
+rest is the zlib compressed JSON tree of the parts:
+
+    [main, sub, params, start, end, parts, enclosed]
+
+where params is a list of [name, value, is_unicode] triples.
+"""
+import json
+import struct
+import zlib
+from collections import deque
+
+from flanker.mime.message.errors import DecodingError, EncodingError
+from flanker.mime.message.headers import ContentType
+from flanker.mime.message.part import MimePart, Stream
+from flanker.mime.message.scanner import _open_stream
+
+
+MAGIC = 'FLMX'
+VERSION = 2
+
+_HEADER = struct.Struct('>4sBQII')
+
+# bytes checksummed at each end of the message
+_SAMPLE = 4096
+
+
+def dump_index(message):
+    """Returns the structural index of the parsed message as a byte
+    string. Raises EncodingError if the message has parts that have not
+    been parsed from the message string, e.g. appended ones"""
+    if not isinstance(message._container, Stream):
+        raise EncodingError("Only parsed messages can be indexed")
+
+    string = message._container.string
+    tree = json.dumps(_dump_part(message), separators=(',', ':'))
+    return _HEADER.pack(MAGIC, VERSION, len(string), _checksum(string),
+                        _ends_checksum(string)) + zlib.compress(tree)
+
+
+def load_index(blob, string, hook=None, strict=True):
+    """Rebuilds the message tree of the string (or memory map) from its
+    structural index without scanning the string. Raises DecodingError if
+    the index is broken, has an unknown version or does not match the
+    message. If `strict` is False only the length and the ends of the
+    message are checked. `hook` records the headers and body stages of
+    the parts"""
+    if len(blob) < _HEADER.size:
+        raise DecodingError("Truncated message index")
+
+    magic, version, length, checksum, ends_checksum = \
+        _HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise DecodingError("Not a message index")
+    if version != VERSION:
+        raise DecodingError(
+            "Unsupported message index version: {0}".format(version))
+    if length != len(string) or (
+            checksum != _checksum(string) if strict
+            else ends_checksum != _ends_checksum(string)):
+        raise DecodingError("Message index does not match the message")
+
+    try:
+        tree = json.loads(zlib.decompress(blob[_HEADER.size:]))
+    except (zlib.error, ValueError):
+        raise DecodingError("Broken message index")
+
+    stream = _open_stream(string)
+    try:
+        return _load_part(tree, string, stream, hook, is_root=True)
+    except (TypeError, ValueError, IndexError, UnicodeError):
+        raise DecodingError("Broken message index")
+
+
+def _dump_part(part):
+    container = part._container
+    if not isinstance(container, Stream):
+        raise EncodingError("Only parsed messages can be indexed")
+
+    content_type = container.content_type
+    params = [[name, _dump_value(value), isinstance(value, unicode)]
+              for name, value in content_type.params.iteritems()]
+    return [content_type.main, content_type.sub, params,
+            container.start, container.end,
+            [_dump_part(p) for p in part.parts],
+            _dump_part(part.enclosed) if part.enclosed else None]
+
+
+def _load_part(node, string, stream, hook, is_root=False):
+    main, sub, params, start, end, parts, enclosed = node
+    params = dict((str(name), value if is_unicode else value.encode('latin-1'))
+                  for name, value, is_unicode in params)
+    return MimePart(
+        container=Stream(
+            content_type=ContentType(str(main), str(sub), params),
+            start=start,
+            end=end,
+            string=string,
+            stream=stream,
+            hook=hook),
+        parts=deque(_load_part(p, string, stream, hook) for p in parts),
+        enclosed=(_load_part(enclosed, string, stream, hook)
+                  if enclosed else None),
+        is_root=is_root)
+
+
+def _dump_value(value):
+    # byte strings are kept byte to byte
+    if isinstance(value, str):
+        return value.decode('latin-1')
+    return value
+
+
+def _checksum(string):
+    return zlib.crc32(string) & 0xffffffff
+
+
+def _ends_checksum(string):
+    if len(string) <= 2 * _SAMPLE:
+        return zlib.crc32(string) & 0xffffffff
+    head = zlib.crc32(string[:_SAMPLE])
+    return zlib.crc32(string[-_SAMPLE:], head) & 0xffffffff
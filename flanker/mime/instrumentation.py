@@ -0,0 +1,120 @@
+"""Per-stage timing and counters of the MIME parser.
+
+A hook is any object with a `record(stage, seconds, **counts)` method,
+it is passed to from_string (from_file, from_buffer) and is called once
+per parsing stage:
+
+* tokenize - searching the message for the tokens, `scanned` tokens
+* filter - telling real tokens from the false ones, `scanned` and
+  `filtered` out tokens
+* traverse - building the message tree, `parts` built
+* headers - parsing the headers of a part, `bytes` of the headers section
+  and the number of `headers`
+* body - decoding the body of a part, raw `bytes` and `decoded` length
+
+The headers and bodies are parsed when they are first accessed, so these
+stages are recorded long after from_string returns. In the lazy mode the
+tree is scanned on demand, and only the headers and body stages are
+recorded. Without a hook nothing is measured.
+
+Aggregator is the default hook that collects the histograms of the
+stage durations and the totals of the counters:
+
+>> stats = mime.Aggregator()
+>> for string in messages:
+>>     mime.from_string(string, hook=stats).walk()
+>> stats.dump()
+"""
+import sys
+import threading
+
+
+class Aggregator(object):
+    """Collects the durations of the stages into log2 histograms of
+    microseconds and sums up their counters. Is safe to share between
+    threads"""
+
+    def __init__(self):
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds, **counts):
+        with self._lock:
+            stats = self.stages.get(stage)
+            if stats is None:
+                stats = self.stages[stage] = StageStats(stage)
+            stats.add(seconds, counts)
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+
+    def dump(self, out=None, histograms=True):
+        """Writes the summary table of the stages and (unless `histograms`
+        is False) the histograms of their durations to `out`, stdout by
+        default"""
+        out = out or sys.stdout
+        with self._lock:
+            stages = sorted(self.stages.values(), key=_stage_order)
+            out.write("{0:<10} {1:>8} {2:>10} {3:>10} {4:>10}  {5}\n".format(
+                "stage", "calls", "total ms", "mean ms", "max ms", "counts"))
+            for s in stages:
+                out.write(
+                    "{0:<10} {1:>8} {2:>10.3f} {3:>10.3f} {4:>10.3f}  {5}\n"
+                    .format(s.stage, s.calls, s.total * 1e3,
+                            s.total / s.calls * 1e3, s.max * 1e3,
+                            " ".join("{0}={1}".format(k, v)
+                                     for k, v in sorted(s.counts.items()))))
+            if histograms:
+                for s in stages:
+                    out.write("\n{0}\n".format(s.stage))
+                    _dump_histogram(s, out)
+
+
+class StageStats(object):
+    """Durations and counters of one stage. `buckets[i]` is the number of
+    calls that took less than 2**i microseconds (and at least 2**(i-1))"""
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = []
+        self.counts = {}
+
+    def add(self, seconds, counts):
+        self.calls += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+        bucket = int(seconds * 1e6).bit_length()
+        if bucket >= len(self.buckets):
+            self.buckets.extend([0] * (bucket + 1 - len(self.buckets)))
+        self.buckets[bucket] += 1
+
+        for name, value in counts.iteritems():
+            self.counts[name] = self.counts.get(name, 0) + value
+
+    def histogram(self):
+        """Returns (upper bound in microseconds, calls) pairs"""
+        return [(2 ** i, n) for i, n in enumerate(self.buckets)]
+
+
+_STAGES = ['tokenize', 'filter', 'traverse', 'headers', 'body']
+_BAR_WIDTH = 40
+
+
+def _stage_order(stats):
+    if stats.stage in _STAGES:
+        return _STAGES.index(stats.stage), stats.stage
+    return len(_STAGES), stats.stage
+
+
+def _dump_histogram(stats, out):
+    top = max(stats.buckets) or 1
+    for bound, calls in stats.histogram():
+        if calls:
+            out.write("  < {0:>9} us {1:>8} {2}\n".format(
+                bound, calls, "#" * max(1, calls * _BAR_WIDTH // top)))
+
@@ -9,7 +9,10 @@ from flanker.mime.message.errors import EncodingError
 class MimeHeaders(object):
     """Dictionary-like object that preserves the order and
     supports multiple values for the same key, knows
-    whether it has been changed after the creation
+    whether it has been changed after the creation.
+
+    Decoded header values are cached, so reading the same
+    header over and over does not decode it over and over.
     """
 
     def __init__(self, items=()):
@@ -17,11 +20,14 @@ class MimeHeaders(object):
                              for (key, val) in items])
         self.changed = False
         self.num_prepends = 0
+        self._decoded = None
+        self._hits = 0
+        self._misses = 0
 
     def __getitem__(self, key):
         v = self._v.get(normalize(key), None)
         if v is not None:
-            return encodedword.decode(v)
+            return self._decode(v)
         return None
 
     def __len__(self):
@@ -38,12 +44,14 @@ class MimeHeaders(object):
         if key in self._v:
             self._v[key] = remove_newlines(value)
             self.changed = True
+            self._decoded = None
         else:
             self.prepend(key, remove_newlines(value))
 
     def __delitem__(self, key):
         del self._v[normalize(key)]
         self.changed = True
+        self._decoded = None
 
     def __nonzero__(self):
         return len(self._v) > 0
@@ -51,6 +59,7 @@ class MimeHeaders(object):
     def prepend(self, key, value):
         self._v._items.insert(0, (normalize(key), remove_newlines(value)))
         self.num_prepends += 1
+        self._decoded = None
 
     def add(self, key, value):
         """Adds header without changing the
@@ -83,6 +92,7 @@ class MimeHeaders(object):
         if changed[0]:
             self._v = v
             self.changed = True
+            self._decoded = None
 
     def items(self):
         """
@@ -97,7 +107,7 @@ class MimeHeaders(object):
         if raw:
             return self._v.iteritems()
 
-        return iter([(x[0], encodedword.decode(x[1]))
+        return iter([(x[0], self._decode(x[1]))
                      for x in self._v.iteritems()])
 
     def get(self, key, default=None):
@@ -106,7 +116,7 @@ class MimeHeaders(object):
         """
         v = self._v.get(normalize(key), default)
         if v is not None:
-            return encodedword.decode(v)
+            return self._decode(v)
         return None
 
     def getraw(self, key, default=None):
@@ -120,7 +130,7 @@ class MimeHeaders(object):
         Returns all header values by the given header name (case-insensitive).
         """
         v = self._v.getall(normalize(key))
-        return [encodedword.decode(x) for x in v]
+        return [self._decode(x) for x in v]
 
     def have_changed(self, ignore_prepends=False):
         """
@@ -128,6 +138,30 @@ class MimeHeaders(object):
         """
         return self.changed or (self.num_prepends > 0 and not ignore_prepends)
 
+    def cache_stats(self):
+        """
+        Returns the decoded values cache statistics: number of hits, misses
+        and cached values.
+        """
+        return {'hits': self._hits,
+                'misses': self._misses,
+                'size': len(self._decoded) if self._decoded else 0}
+
+    def _decode(self, value):
+        # only strings get decoded, other values are returned as is
+        if not isinstance(value, basestring):
+            return value
+
+        if self._decoded is None:
+            self._decoded = {}
+        try:
+            decoded = self._decoded[value]
+            self._hits += 1
+        except KeyError:
+            decoded = self._decoded[value] = encodedword.decode(value)
+            self._misses += 1
+        return decoded
+
     def __str__(self):
         return str(self._v)
 
@@ -10,6 +10,8 @@ from email.utils import make_msgid
 
 class WithParams(tuple):
 
+    __slots__ = ()
+
     def __new__(self, value, params=None):
         return tuple.__new__(self, (value, params or {}))
 
@@ -24,13 +26,26 @@ class WithParams(tuple):
 
 class ContentType(tuple):
 
-    def __new__(self, main, sub, params=None):
-        return tuple.__new__(
-            self, (main.lower() + '/' + sub.lower(), params or {}))
+    # main and sub types are derived from the lower-cased value, so the
+    # parsed content types (lower-cased by fix_content_type) do not need
+    # an instance dictionary. A tuple subclass can not have non-empty
+    # slots, so the content types created with mixed-case types are
+    # _MixedCaseContentType that keeps them in its dictionary.
+    __slots__ = ()
+
+    def __new__(cls, main, sub, params=None):
+        value = main.lower() + '/' + sub.lower()
+        if cls is ContentType and value != main + '/' + sub:
+            cls = _MixedCaseContentType
+        return tuple.__new__(cls, (value, params or {}))
+
+    @property
+    def main(self):
+        return tuple.__getitem__(self, 0).partition('/')[0]
 
-    def __init__(self, main, sub, params={}):
-        self.main = main
-        self.sub = sub
+    @property
+    def sub(self):
+        return tuple.__getitem__(self, 0).partition('/')[2]
 
     @property
     def value(self):
@@ -58,12 +73,12 @@ class ContentType(tuple):
         return False
 
     def is_singlepart(self):
-        return self.main != 'multipart' and\
-            self.main != 'message' and\
+        return self.format_type != 'multipart' and\
+            self.format_type != 'message' and\
             not self.is_headers_container()
 
     def is_multipart(self):
-        return self.main == 'multipart'
+        return self.format_type == 'multipart'
 
     def is_headers_container(self):
         return self.is_feedback_report() or \
@@ -100,7 +115,7 @@ class ContentType(tuple):
             self.get_boundary(), "--" if final else "")
 
     def get_charset(self):
-        default = 'ascii' if self.main == 'text' else None
+        default = 'ascii' if self.format_type == 'text' else None
         c = self.params.get("charset", default)
         if c:
             c = c.lower()
@@ -110,17 +125,16 @@ class ContentType(tuple):
         self.params["charset"] = value.lower()
 
     def __str__(self):
-        return "{0}/{1}".format(self.main, self.sub)
+        return tuple.__getitem__(self, 0)
 
     def __eq__(self, other):
         if isinstance(other, ContentType):
-            return self.main == other.main \
-                and self.sub == other.sub \
+            return self.value == other.value \
                 and self.params == other.params
         elif isinstance(other, tuple):
             return tuple.__eq__(self, other)
         elif isinstance(other, (unicode, str)):
-            return str(self) == other
+            return self.value == other
         else:
             return False
 
@@ -132,6 +146,26 @@ class ContentType(tuple):
                                                       self.params)
 
 
+class _MixedCaseContentType(ContentType):
+    """Content type created with mixed-case main or sub type, which are
+    kept as they are. The value and the comparisons are lower-cased"""
+
+    def __init__(self, main, sub, params=None):
+        self._main = main
+        self._sub = sub
+
+    @property
+    def main(self):
+        return self._main
+
+    @property
+    def sub(self):
+        return self._sub
+
+    def __str__(self):
+        return "{0}/{1}".format(self._main, self._sub)
+
+
 class MessageId(str):
 
     RE_ID = re.compile("<([^<>]+)>", re.I)
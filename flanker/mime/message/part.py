@@ -1,8 +1,12 @@
+import binascii
+import codecs
 import email.utils
 import email.encoders
 import logging
 import mimetypes
 import imghdr
+import regex as re
+import time
 from contextlib import closing
 from cStringIO import StringIO
 
@@ -22,14 +26,24 @@ log = logging.getLogger(__name__)
 
 CTE = WithParams('7bit', {})
 
+# default size of the chunks read when the body is decoded incrementally
+CHUNK_SIZE = 64 * 1024
+
 class Stream(object):
 
-    def __init__(self, content_type, start, end, string, stream):
+    __slots__ = ('content_type', 'start', 'end', 'string', 'stream',
+                 '_headers', '_body_start', '_body', '_body_changed', 'size',
+                 'hook')
+
+    def __init__(self, content_type, start, end, string, stream, hook=None):
         self.content_type = content_type
         self.start = start
         self.end = end
         self.string = string
         self.stream = stream
+        # records the time spent on parsing the headers and decoding the
+        # body, see flanker.mime.instrumentation
+        self.hook = hook
 
         self._headers = None
         self._body_start = None
@@ -60,20 +74,55 @@ class Stream(object):
         self.stream.seek(self._body_start)
         return self.stream.read(self.end - self._body_start + 1)
 
+    def message_buffer(self):
+        """Returns the message as a buffer over the string, no copying"""
+        return _buffer(self.string, self.start, self.end)
+
+    def body_buffer(self):
+        """Returns the body as a buffer over the string, no copying"""
+        self._load_headers()
+        return _buffer(self.string, self._body_start, self.end)
+
+    def iter_body(self, chunk_size=CHUNK_SIZE, decode_charset=True):
+        """
+        Reads the body chunk by chunk decoding the transfer encoding and
+        (unless `decode_charset` is False) the charset on the fly.
+        """
+        self._load_headers()
+        chunks = iter_decode_transfer_encoding(
+            self.headers.get('Content-Transfer-Encoding', CTE).value,
+            _read_chunks(
+                self.stream, self._body_start, self.end + 1, chunk_size))
+        if decode_charset:
+            chunks = iter_decode_charset(self.content_type, chunks)
+        return chunks
+
     def _load_headers(self):
         if self._headers is None:
+            if self.hook is not None:
+                started = time.time()
             self.stream.seek(self.start)
             self._headers = headers.MimeHeaders.from_stream(self.stream)
             self._body_start = self.stream.tell()
+            if self.hook is not None:
+                self.hook.record('headers', time.time() - started,
+                                 bytes=self._body_start - self.start,
+                                 headers=len(self._headers))
 
     def _load_body(self):
         if self._body is None:
             self._load_headers()
+            if self.hook is not None:
+                started = time.time()
             self.stream.seek(self._body_start)
+            body = self.stream.read(self.end - self._body_start + 1)
             self._body = decode_body(
                 self.content_type,
                 self.headers.get('Content-Transfer-Encoding', CTE).value,
-                self.stream.read(self.end - self._body_start + 1))
+                body)
+            if self.hook is not None:
+                self.hook.record('body', time.time() - started,
+                                 bytes=len(body), decoded=len(self._body))
 
     def _set_body(self, value):
         if value != self._body:
@@ -212,6 +261,8 @@ class Part(object):
 
 class RichPartMixin(object):
 
+    __slots__ = ('_is_root', '_bounce')
+
     def __init__(self, is_root=False):
         self._is_root = is_root
         self._bounce = None
@@ -393,6 +444,8 @@ class RichPartMixin(object):
 
 class MimePart(RichPartMixin):
 
+    __slots__ = ('_container', 'parts', 'enclosed')
+
     def __init__(self, container, parts=None, enclosed=None, is_root=False):
         RichPartMixin.__init__(self, is_root)
         self._container = container
@@ -409,9 +462,7 @@ class MimePart(RichPartMixin):
                 return sum(part._container.size
                            for part in self.walk(with_self=True))
         else:
-            with closing(_CounterIO()) as out:
-                self.to_stream(out)
-                return out.getvalue()
+            return sum(len(s) for s in self.to_segments())
 
     @property
     def headers(self):
@@ -456,6 +507,36 @@ class MimePart(RichPartMixin):
                 or self.content_type.is_delivery_status():
             self._container.body = value
 
+    def iter_body(self, chunk_size=CHUNK_SIZE):
+        """
+        Yields the decoded body in chunks (unicode for text parts).
+        Unlike `body` it does not hold the whole decoded body in memory.
+        """
+        return self._iter_body(chunk_size, decode_charset=True)
+
+    def body_to_stream(self, out, chunk_size=CHUNK_SIZE):
+        """
+        Writes the body decoded from the transfer encoding (but not from
+        the charset) to a file like object, chunk by chunk.
+        """
+        for chunk in self._iter_body(chunk_size, decode_charset=False):
+            out.write(chunk)
+
+    def _iter_body(self, chunk_size, decode_charset):
+        if not (self.content_type.is_singlepart()
+                or self.content_type.is_delivery_status()):
+            return iter([])
+
+        container = self._container
+        if isinstance(container, Stream) and container._body is None:
+            return container.iter_body(chunk_size, decode_charset)
+
+        body = container.body or ''
+        if not decode_charset and isinstance(body, unicode):
+            _, body = encode_charset(self.charset, body)
+        return (body[i:i + chunk_size]
+                for i in xrange(0, len(body), chunk_size))
+
     @property
     def charset(self):
         return self.content_type.get_charset()
@@ -480,26 +561,44 @@ class MimePart(RichPartMixin):
         if self.is_root() and not self.was_changed(ignore_prepends=True):
             with closing(StringIO()) as out:
                 self._container._stream_prepended_headers(out)
-                return out.getvalue() + self._container.string
+                return out.getvalue() + self._container.string[:]
         else:
-            with closing(StringIO()) as out:
-                self.to_stream(out)
-                return out.getvalue()
+            return ''.join([s if isinstance(s, str) else str(s)
+                            for s in self.to_segments()])
 
     def to_stream(self, out):
         """
-        Serializes the message using a file like object.
+        Serializes the message using a file like object. The segments are
+        written as byte strings, one by one, for the writers that do not
+        take buffers.
+        """
+        for segment in self.to_segments():
+            out.write(segment if isinstance(segment, str) else str(segment))
+
+    def to_segments(self):
+        """
+        Returns the MIME representation of the message as a list of
+        segments: byte strings rendered for the changed headers and bodies
+        and buffers over the original message string (or memory map) for
+        the unchanged parts and bodies. The segments can be written one by
+        one to a file or a socket or joined once, so serializing a message
+        with a single changed header costs about the size of that header.
         """
+        segments = []
+        self._to_segments(segments)
+        return segments
+
+    def _to_segments(self, segments):
         if not self.was_changed(ignore_prepends=True):
-            self._container._stream_prepended_headers(out)
-            out.write(self._container.read_message())
+            _render(segments, self._container._stream_prepended_headers)
+            segments.append(self._container.message_buffer())
         else:
+            size = len(segments)
             try:
-                original_position = out.tell()
-                self._to_stream_when_changed(out)
+                self._to_segments_when_changed(segments)
             except DecodingError:
-                out.seek(original_position)
-                out.write(self._container.read_message())
+                del segments[size:]
+                segments.append(self._container.message_buffer())
 
     def was_changed(self, ignore_prepends=False):
         if self._container.headers_changed(ignore_prepends):
@@ -529,7 +628,7 @@ class MimePart(RichPartMixin):
         message.set_root(False)
 
 
-    def _to_stream_when_changed(self, out):
+    def _to_segments_when_changed(self, segments):
 
         ctype = self.content_type
 
@@ -541,30 +640,48 @@ class MimePart(RichPartMixin):
                     self.charset = charset
                 self.content_encoding = WithParams(encoding)
             else:
-                body = self._container.read_body()
+                body = self._container.body_buffer()
 
             # RFC allows subparts without headers
             if self.headers:
-                self.headers.to_stream(out)
+                _render(segments, self.headers.to_stream)
             elif self.is_root():
                 raise EncodingError("Root message should have headers")
 
-            out.write(CRLF)
-            out.write(body)
+            segments.append(CRLF)
+            segments.append(body)
         else:
-            self.headers.to_stream(out)
-            out.write(CRLF)
+            _render(segments, self.headers.to_stream)
+            segments.append(CRLF)
 
             if ctype.is_multipart():
                 boundary = ctype.get_boundary_line()
                 for index, part in enumerate(self.parts):
-                    out.write(
+                    segments.append(
                         (CRLF if index != 0 else "") + boundary + CRLF)
-                    part.to_stream(out)
-                out.write(CRLF + ctype.get_boundary_line(final=True) + CRLF)
+                    part._to_segments(segments)
+                segments.append(
+                    CRLF + ctype.get_boundary_line(final=True) + CRLF)
 
             elif ctype.is_message_container():
-                self.enclosed.to_stream(out)
+                self.enclosed._to_segments(segments)
+
+
+def _render(segments, to_stream):
+    """Appends what the function writes to a stream to the segments"""
+    with closing(StringIO()) as out:
+        to_stream(out)
+        value = out.getvalue()
+    if value:
+        segments.append(value)
+
+
+def _buffer(string, start, end):
+    # like reading end - start + 1 bytes from the start, which reads up to
+    # the end of the string if the size is negative
+    if end < start - 1:
+        return buffer(string, start)
+    return buffer(string, start, end - start + 1)
 
 
 def decode_body(content_type, content_encoding, body):
@@ -603,6 +720,141 @@ def decode_charset(ctype, body):
     return body
 
 
+def iter_decode_transfer_encoding(encoding, chunks):
+    if encoding == 'base64':
+        decoded = _iter_bdecode(chunks)
+    elif encoding == 'quoted-printable':
+        decoded = _iter_qdecode(chunks)
+    else:
+        return chunks
+    return _reraise_as_decoding_error(decoded)
+
+
+def iter_decode_charset(ctype, chunks):
+    if ctype.main != 'text':
+        for chunk in chunks:
+            yield chunk
+        return
+
+    # unlike decode_charset we can not guess the charset without looking
+    # at the whole body, so undecodable bytes are replaced instead
+    charset = ctype.get_charset()
+    try:
+        decoder = codecs.getincrementaldecoder(
+            charsets._translate_charset(charset))('replace')
+    except LookupError:
+        decoder = codecs.getincrementaldecoder('utf-8')('replace')
+
+    nbsp = ctype.sub == 'html' and charset == 'utf-8'
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text.replace(u'\xa0', u'&nbsp;') if nbsp else text
+    text = decoder.decode('', True)
+    if text:
+        yield text.replace(u'\xa0', u'&nbsp;') if nbsp else text
+
+
+def _read_chunks(stream, start, end, chunk_size):
+    # the stream is shared by all the parts of the message,
+    # so seek before every read
+    while start < end:
+        stream.seek(start)
+        chunk = stream.read(min(chunk_size, end - start))
+        if not chunk:
+            return
+        start += len(chunk)
+        yield chunk
+
+
+def _iter_bdecode(chunks):
+    pending = ''
+    for chunk in chunks:
+        groups, pending, end = _split_base64(
+            pending + _RE_NOT_BASE64.sub('', chunk), final=False)
+        if groups:
+            yield binascii.a2b_base64(groups)
+        if end:
+            return
+    groups, _, _ = _split_base64(pending, final=True)
+    if groups:
+        yield binascii.a2b_base64(groups)
+
+
+def _split_base64(string, final):
+    """Returns the complete 4-char groups of base64 `string`, the rest of
+    it and whether the padding has ended the data. Like a2b_base64 does,
+    pads in the first half of a group are ignored, so are the lone pads in
+    the third char, the rest of the data after the end padding is dropped.
+    Unless `final`, a pad that is the last char may be ended by the pad in
+    the next chunk, so its group is returned with the rest"""
+    pieces = []
+    length = 0
+    start = 0
+    stop = len(string)
+    while True:
+        pad = string.find('=', start)
+        if pad == -1:
+            break
+        position = (length + pad - start) % 4
+        if position == 3 or string[pad + 1:pad + 2] == '=' and position == 2:
+            # a2b_base64 looks for the second pad too
+            pieces.append(string[start:pad + 2])
+            return ''.join(pieces), '', True
+        if position == 2 and pad + 1 == len(string) and not final:
+            stop = pad
+            break
+        pieces.append(string[start:pad])
+        length += pad - start
+        start = pad + 1
+    pieces.append(string[start:stop])
+    data = ''.join(pieces)
+    size = len(data) if final else len(data) - len(data) % 4
+    return data[:size], data[size:] + string[stop:], False
+
+
+def _iter_qdecode(chunks):
+    pending = ''
+    for chunk in chunks:
+        pending += chunk
+        size = _split_qp(pending)
+        if size:
+            yield binascii.a2b_qp(pending[:size])
+            pending = pending[size:]
+    if pending:
+        yield binascii.a2b_qp(pending)
+
+
+def _split_qp(string):
+    """Returns the length of the longest prefix of quoted-printable
+    `string` that decodes the same on its own, i.e. does not end inside a
+    soft line break or an =XX escape"""
+    # soft line breaks and escapes never span lines
+    line = string.rfind('\n') + 1
+    # "=\r" soft line break skips the rest of the line
+    size = string.find('=\r', line)
+    if size == -1:
+        size = len(string)
+    # the escapes take at most two chars after the "="
+    while size > line:
+        escape = string.rfind('=', max(line, size - 2), size)
+        if escape == -1:
+            break
+        size = escape
+    return size
+
+
+def _reraise_as_decoding_error(chunks):
+    try:
+        for chunk in chunks:
+            yield chunk
+    except Exception:
+        raise DecodingError("Failed to decode body")
+
+
+_RE_NOT_BASE64 = re.compile(r'[^A-Za-z0-9+/=]+')
+
+
 def encode_body(part):
     content_type = part.content_type
     content_encoding = part.content_encoding.value
@@ -670,17 +922,3 @@ def has_long_lines(text, max_line_len=599):
     return False
 
 CRLF = "\r\n"
-
-class _CounterIO(object):
-    def __init__(self):
-        self.length = 0
-    def tell(self):
-        return self.length
-    def write(self, s):
-        self.length += len(s)
-    def seek(self, p):
-        self.length = p
-    def getvalue(self):
-        return self.length
-    def close(self):
-        pass
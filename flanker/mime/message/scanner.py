@@ -1,8 +1,11 @@
 import regex as re
 from collections import deque
 from cStringIO import StringIO
+import mmap
 import sys
-from flanker.mime.message.headers import parsing, is_empty, ContentType
+import time
+from flanker.mime.message.headers import (parsing, is_empty, ContentType,
+                                          MimeHeaders)
 from flanker.mime.message.part import MimePart, Stream
 from flanker.mime.message.errors import DecodingError
 from logging import getLogger
@@ -10,18 +13,126 @@ from logging import getLogger
 log = getLogger(__name__)
 
 
-def scan(string):
+def scan(string, headers=None, lazy=False, hook=None):
     """Scanner that uses 1 pass to scan the entire message and
-    build a message tree"""
+    build a message tree. Accepts a byte string or a read-only
+    memory map of the message, in the latter case the parts read
+    their headers and bodies directly from the mapping.
 
-    if not isinstance(string, str):
+    `headers` is the HeaderBlock returned by scan_headers for the same
+    string, the headers section is not scanned and parsed again then.
+
+    In the `lazy` mode the message is scanned only as far as the accessed
+    parts require: the parts of multipart messages are traversed when
+    `parts` or `walk()` reaches them, so the errors in the message
+    structure are raised at that moment too.
+
+    `hook` records the durations and the counters of the parsing stages,
+    see flanker.mime.instrumentation"""
+
+    if not isinstance(string, (str, mmap.mmap)):
+        raise DecodingError("Scanner works with byte strings only")
+
+    if headers is None or headers._tokens is None:
+        prefix, position = (), 0
+    else:
+        prefix, position = headers._tokens, headers._scanned
+
+    if lazy:
+        message = build_lazy_tree(
+            string, _iter_tokens(string, prefix, position), hook)
+    elif hook is None:
+        message = build_tree(
+            string, list(_iter_tokens(string, prefix, position)))
+    else:
+        message = _build_timed_tree(string, prefix, position, hook)
+
+    if headers is not None and headers._scanned is not None:
+        # the message shares the parsed headers with the block
+        message._container._headers = headers.headers
+        message._container._body_start = headers.body_start
+    return message
+
+
+def scan_headers(string):
+    """Scans and parses the top level headers section of the message
+    only, returns a HeaderBlock. The work is proportional to the size of
+    the headers, not of the message"""
+
+    if not isinstance(string, (str, mmap.mmap)):
         raise DecodingError("Scanner works with byte strings only")
 
-    tokens = tokenize(string)
+    # tokens of the headers section, up to the first empty line
+    tokens = []
+    content_type = None
+    scanned = len(string)
+    for m in _RE_TOKENIZER.finditer(string):
+        token = _make_token(m, string)
+        if isinstance(token, Boundary):
+            # boundaries are false until a content type names them,
+            # otherwise leave the message to the full scan
+            if content_type is None:
+                continue
+            tokens = None
+            break
+        if content_type is None and isinstance(token, ContentType):
+            content_type = token
+        tokens.append(token)
+        if token is _EMPTY_LINE:
+            scanned = m.end()
+            break
+
+    stream = _open_stream(string)
+    block = HeaderBlock(
+        None, content_type or _DEFAULT_CONTENT_TYPE, 0, 0,
+        headers=MimeHeaders.from_stream(stream))
+    block.body_start = stream.tell()
+    block._tokens = tokens
+    block._scanned = scanned
+    return block
+
+
+def build_tree(string, tokens, hook=None):
+    """Builds the message tree out of the tokens found in the string"""
     if not tokens:
         tokens = [default_content_type()]
     try:
-        return traverse(Start(), TokensIterator(tokens, string))
+        return traverse(Start(), TokensIterator(tokens, string, hook))
+    except DecodingError:
+        raise
+    except Exception:
+        raise DecodingError("Malformed MIME message"), None, sys.exc_info()[2]
+
+
+def build_lazy_tree(string, tokens, hook=None):
+    """Builds the root of the message tree, the rest of it is built
+    as the tokens are pulled from the `tokens` iterator"""
+    return _materialize(
+        traverse, Start(), LazyTokensIterator(tokens, string, hook))
+
+
+def _build_timed_tree(string, tokens, position, hook):
+    """Scans the string and builds the message tree recording the
+    tokenize, filter and traverse stages with the hook"""
+    token_filter = _TimedTokenFilter()
+    started = time.time()
+    tokens = list(_iter_tokens(string, tokens, position, token_filter))
+    scanned = time.time()
+    hook.record('tokenize', scanned - started - token_filter.elapsed,
+                scanned=token_filter.scanned)
+    hook.record('filter', token_filter.elapsed,
+                scanned=token_filter.scanned,
+                filtered=token_filter.scanned - len(tokens))
+
+    message = build_tree(string, tokens, hook)
+    hook.record('traverse', time.time() - scanned,
+                parts=sum(1 for _ in message.walk(with_self=True)))
+    return message
+
+
+def _materialize(fn, *args):
+    try:
+        return fn(*args)
     except DecodingError:
         raise
     except Exception:
@@ -77,7 +188,6 @@ def traverse(pointer, iterator, parent=None):
             raise DecodingError(
                 "Multipart message without boundary")
 
-        parts = deque()
         token = iterator.next()
 
         # we are expecting first boundary for multipart message
@@ -86,6 +196,15 @@ def traverse(pointer, iterator, parent=None):
             raise DecodingError(
                 "Multipart message without starting boundary")
 
+        if iterator.lazy:
+            return make_lazy_part(
+                content_type=content_type,
+                start=pointer,
+                iterator=iterator,
+                parent=parent)
+
+        parts = deque()
+
         while True:
             token = iterator.current()
             if token.is_end():
@@ -129,6 +248,13 @@ def traverse(pointer, iterator, parent=None):
     # headers by newline
     elif token.is_message_container():
         enclosed = traverse(pointer, iterator, token)
+        if iterator.lazy:
+            return make_lazy_part(
+                content_type=token,
+                start=pointer,
+                iterator=iterator,
+                enclosed=enclosed,
+                parent=parent)
         return make_part(
             content_type=token,
             start=pointer,
@@ -184,6 +310,42 @@ def default_content_type():
 def make_part(content_type, start, end, iterator, parts=[], enclosed=None,
               parent=None):
 
+    # ok, finally, create the MimePart.
+    # note that it does not parse anything, just remembers
+    # the position in the string
+    return MimePart(
+        container=Stream(
+            content_type=content_type,
+            start=_part_start(start, iterator, parent),
+            end=_part_end(content_type, end, iterator),
+            stream=iterator.stream,
+            string=iterator.string,
+            hook=iterator.hook),
+        parts=parts,
+        enclosed=enclosed,
+        is_root=(parent==None))
+
+
+def make_lazy_part(content_type, start, iterator, enclosed=None,
+                   parent=None):
+    """Creates a multipart or message container part, which parts are
+    traversed and which end is located when they are first needed"""
+    container = _LazyStream(
+        content_type=content_type,
+        start=_part_start(start, iterator, parent),
+        end=None,
+        stream=iterator.stream,
+        string=iterator.string,
+        hook=iterator.hook)
+    part = LazyMimePart(container, enclosed=enclosed, is_root=(parent==None))
+    part._iterator = iterator
+    if content_type.is_multipart():
+        part.parts = LazyParts(content_type, iterator)
+    container._part = part
+    return part
+
+
+def _part_start(start, iterator, parent):
     # here we detect where the message really starts
     # the exact position in the string, at the end of the
     # starting boundary and after the beginning of the end boundary
@@ -192,39 +354,29 @@ def make_part(content_type, start, end, iterator, parts=[], enclosed=None,
     else:
         start = start.start
 
+    # our tokenizer detected the beginning of the message container
+    # that is separated from the enclosed message by newlines
+    # here we find where the enclosed message begins by searching for the
+    # first newline
+    if parent and (parent.is_message_container() or parent.is_headers_container()):
+        start = locate_first_newline(iterator.stream, start)
+
+    return start
+
+
+def _part_end(content_type, end, iterator):
     # if this is the message ending, end of part
     # the position of the last symbol of the message
     if end.is_end():
-        end = len(iterator.string) - 1
+        return len(iterator.string) - 1
     # for multipart boundaries
     # consider the final boundary as the ending one
     elif content_type.is_multipart():
-        end = end.end
+        return end.end
     # otherwise, end is position of the the symbol before
     # the boundary start
     else:
-        end = end.start - 1
-
-    # our tokenizer detected the beginning of the message container
-    # that is separated from the enclosed message by newlines
-    # here we find where the enclosed message begins by searching for the
-    # first newline
-    if parent and (parent.is_message_container() or parent.is_headers_container()):
-        start = locate_first_newline(iterator.stream, start)
-
-    # ok, finally, create the MimePart.
-    # note that it does not parse anything, just remembers
-    # the position in the string
-    return MimePart(
-        container=Stream(
-            content_type=content_type,
-            start=start,
-            end=end,
-            stream=iterator.stream,
-            string=iterator.string),
-        parts=parts,
-        enclosed=enclosed,
-        is_root=(parent==None))
+        return end.start - 1
 
 
 def locate_first_newline(stream, start):
@@ -237,12 +389,15 @@ def locate_first_newline(stream, start):
 
 class TokensIterator(object):
 
-    def __init__(self, tokens, string):
+    lazy = False
+
+    def __init__(self, tokens, string, hook=None):
         self.position = -1
         self.tokens = tokens
         self.string = string
-        self.stream = StringIO(string)
+        self.stream = _open_stream(string)
         self.opcount = 0
+        self.hook = hook
 
     def next(self):
         self.position += 1
@@ -270,7 +425,207 @@ class TokensIterator(object):
                     self.opcount, _MAX_OPS))
 
 
+class LazyTokensIterator(TokensIterator):
+    """Pulls the tokens from an iterator as the traversal reaches them"""
+
+    lazy = True
+
+    def __init__(self, tokens, string, hook=None):
+        TokensIterator.__init__(self, [], string, hook)
+        self._pending = tokens
+        self._pull(0)
+        if not self.tokens:
+            self.tokens.append(default_content_type())
+
+    def next(self):
+        self._pull(self.position + 1)
+        return TokensIterator.next(self)
+
+    def current(self):
+        self._pull(self.position)
+        return TokensIterator.current(self)
+
+    def _pull(self, position):
+        while self._pending is not None and position >= len(self.tokens):
+            try:
+                self.tokens.append(next(self._pending))
+            except StopIteration:
+                self._pending = None
+
+
+class LazyParts(object):
+    """Parts of a multipart message that are traversed on demand. The
+    parts are traversed in the order of the message, so getting a part
+    traverses all the parts that precede it. Iteration traverses the parts
+    one by one, anything else than indexing and iteration traverses all of
+    them and is delegated to the deque with the parts"""
+
+    def __init__(self, content_type, iterator):
+        self._parts = deque()
+        self._content_type = content_type
+        self._iterator = iterator
+        # the token that ends the multipart, once all parts are traversed
+        self._end = None
+
+    def materialized(self):
+        """Returns the parts that have been traversed so far"""
+        return self._parts
+
+    def __iter__(self):
+        i = 0
+        while i < len(self._parts) or self._next():
+            yield self._parts[i]
+            i += 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice) or index < 0:
+            self._finish()
+        while index >= len(self._parts) and self._next():
+            pass
+        return self._parts[index]
+
+    def __len__(self):
+        self._finish()
+        return len(self._parts)
+
+    def __nonzero__(self):
+        return bool(self._parts) or self._next()
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        self._finish()
+        return getattr(self._parts, name)
+
+    def __repr__(self):
+        self._finish()
+        return repr(self._parts)
+
+    def _finish(self):
+        while self._next():
+            pass
+
+    def _next(self):
+        """Traverses the next part, returns False if there are no more"""
+        if self._end is not None:
+            return False
+        if self._parts:
+            _finish(self._parts[-1])
+
+        iterator = self._iterator
+        token = _materialize(iterator.current)
+        boundary = self._content_type.get_boundary()
+        if token.is_end():
+            self._end = token
+            return False
+        if token == boundary and token.is_final():
+            iterator.next()
+            self._end = token
+            return False
+        self._parts.append(
+            _materialize(traverse, token, iterator, self._content_type))
+        return True
+
+
+class LazyMimePart(MimePart):
+    """Multipart or message container part of a lazily scanned message"""
+
+    __slots__ = ('_iterator',)
+
+    def was_changed(self, ignore_prepends=False):
+        # parts that have not been traversed yet have not been changed
+        if isinstance(self.parts, LazyParts):
+            if self._container.headers_changed(ignore_prepends):
+                return True
+            return any(p.was_changed() for p in self.parts.materialized())
+        return MimePart.was_changed(self, ignore_prepends)
+
+    def _finish(self):
+        """Traverses the rest of the part to locate its end"""
+        container = self._container
+        if container._end is not None:
+            return
+        if isinstance(self.parts, LazyParts):
+            self.parts._finish()
+            end = self.parts._end
+        else:
+            _finish(self.enclosed)
+            end = _materialize(self._iterator.current)
+        container._end = _part_end(self.content_type, end, self._iterator)
+
+
+def _finish(part):
+    if isinstance(part, LazyMimePart):
+        part._finish()
+
+
+class _LazyStream(Stream):
+    """Stream which end is located when it is first needed"""
+
+    __slots__ = ('_end', '_part')
+
+    def _get_end(self):
+        if self._end is None:
+            self._part._finish()
+        return self._end
+
+    def _set_end(self, value):
+        self._end = value
+
+    end = property(_get_end, _set_end)
+
+    # locating the end moves the shared stream, so it is done before
+    # the stream is positioned for reading
+
+    def read_message(self):
+        self._get_end()
+        return Stream.read_message(self)
+
+    def read_body(self):
+        self._get_end()
+        return Stream.read_body(self)
+
+
+def _open_stream(string):
+    if isinstance(string, mmap.mmap):
+        return MappedStream(string)
+    return StringIO(string)
+
+
+class MappedStream(object):
+    """File-like wrapper around a memory mapped message, provides the
+    subset of cStringIO interface the parts use to read the message.
+    Reads copy only the requested slice out of the mapping"""
+
+    def __init__(self, mapping):
+        self.mapping = mapping
+
+    def seek(self, position):
+        self.mapping.seek(position)
+
+    def tell(self):
+        return self.mapping.tell()
+
+    def read(self, size=-1):
+        if size < 0:
+            size = len(self.mapping) - self.mapping.tell()
+        return self.mapping.read(size)
+
+    def readline(self):
+        return self.mapping.readline()
+
+    def __iter__(self):
+        while True:
+            line = self.mapping.readline()
+            if not line:
+                return
+            yield line
+
+
 class Boundary(object):
+
+    __slots__ = ('value', 'start', 'end', 'final')
+
     def __init__(self, value, start, end, final=None):
         self.value = value
         self.start = start
@@ -390,19 +745,111 @@ def tokenize(string):
     """
     Scans the entire message to find all Content-Types and boundaries.
     """
-    tokens = deque()
-    for m in _RE_TOKENIZER.finditer(string):
-        if m.group(_CTYPE):
-            name, token = parsing.parse_header(m.group(_CTYPE))
-        elif m.group(_BOUNDARY):
-            token = Boundary(m.group(_BOUNDARY).strip("\t\r\n"),
-                             _grab_newline(m.start(), string, -1),
-                             _grab_newline(m.end(), string, 1))
+    return list(_iter_tokens(string))
+
+
+def _iter_tokens(string, tokens=(), position=0, token_filter=None):
+    """
+    Yields the real tokens one by one as the message is scanned, `tokens`
+    are the tokens scanned so far and `position` is where the scan goes on.
+    `token_filter` is the _TokenFilter to tell the real tokens with.
+
+    Only the header sections are tokenized, the bodies, preambles and
+    epilogues are searched for the lines with the boundaries declared by
+    the content types met so far, as nothing else can change the state
+    of the token filter there.
+    """
+    token_filter = token_filter or _TokenFilter()
+    for token in tokens:
+        if token_filter.accept(token):
+            yield token
+
+    finder = _BoundaryFinder(string)
+    while True:
+        if token_filter.section == _SECTION_HEADERS:
+            match = _RE_TOKENIZER.search(string, position)
+            if not match:
+                return
+            token = _make_token(match, string)
+            position = match.end()
         else:
-            token = _EMPTY_LINE
+            line = finder.find(token_filter.boundaries, position)
+            if not line:
+                return
+            start, position = line
+            token = Boundary(string[start:position].strip("\t\r\n"),
+                             _grab_newline(start, string, -1),
+                             _grab_newline(position, string, 1))
+        if token_filter.accept(token):
+            yield token
+
+
+class _BoundaryFinder(object):
+    """
+    Searches the message for the lines that start with "--" followed by one
+    of the boundaries. The next line of every boundary is remembered, so
+    every boundary is searched for once per its line.
+    """
 
-        tokens.append(token)
-    return _filter_false_tokens(tokens)
+    def __init__(self, string):
+        self.string = string
+        # boundary -> (position the search started from, line start or -1)
+        self._found = {}
+
+    def find(self, boundaries, position):
+        """
+        Returns the (start, end) positions of the first such line starting
+        at or after the position, the end excludes the line break.
+        """
+        start = -1
+        for boundary in boundaries:
+            line = self._find(boundary, position)
+            if line != -1 and (start == -1 or line < start):
+                start = line
+        if start == -1:
+            return None
+
+        end = self.string.find('\n', start)
+        return start, end if end != -1 else len(self.string)
+
+    def _find(self, boundary, position):
+        if not boundary:
+            return -1
+        found = self._found.get(boundary)
+        if found and (found[1] >= position or
+                      found[1] == -1 and found[0] <= position):
+            return found[1]
+
+        try:
+            delimiter = '--' + boundary.encode('ascii')
+        except UnicodeError:
+            # can not be equal to a line of the byte string
+            return -1
+
+        if position == 0 and self.string[:len(delimiter)] == delimiter:
+            line = 0
+        else:
+            line = self.string.find('\n' + delimiter, max(position - 1, 0))
+            if line != -1:
+                line += 1
+        self._found[boundary] = (position, line)
+        return line
+
+
+def _make_token(match, string, offset=0):
+    """
+    Converts a tokenizer match into a token, `offset` is the position of the
+    scanned string in the message, boundary positions are adjusted by it.
+    """
+    if match.group(_CTYPE):
+        name, token = parsing.parse_header(match.group(_CTYPE))
+    elif match.group(_BOUNDARY):
+        token = Boundary(match.group(_BOUNDARY).strip("\t\r\n"),
+                         _grab_newline(match.start(), string, -1) + offset,
+                         _grab_newline(match.end(), string, 1) + offset)
+    else:
+        token = _EMPTY_LINE
+    return token
 
 
 def _grab_newline(position, string, direction):
@@ -424,6 +871,15 @@ def _filter_false_tokens(tokens):
     """
     Traverses a list of pre-scanned tokens and removes false content-type
     and boundary tokens.
+    """
+    token_filter = _TokenFilter()
+    return [token for token in tokens if token_filter.accept(token)]
+
+
+class _TokenFilter(object):
+    """
+    State machine that tells real tokens from the false ones. It is fed with
+    pre-scanned tokens one by one, so the state survives between the calls.
 
     A content-type header is false unless it it the first content-type header
     in a message/part headers section.
@@ -431,62 +887,230 @@ def _filter_false_tokens(tokens):
     A boundary token is false if it has not been mentioned in a preceding
     content-type header.
     """
-    current_section = _SECTION_HEADERS
-    current_content_type = None
-    filtered = []
-    boundaries = []
-    for token in tokens:
+
+    def __init__(self):
+        self.section = _SECTION_HEADERS
+        self.content_type = None
+        self.boundaries = []
+
+    def accept(self, token):
+        """
+        Updates the state with the token and tells whether it is a real
+        content-type or boundary token.
+        """
         if isinstance(token, ContentType):
             # Only the first content-type header in a headers section is valid.
-            if current_content_type or current_section != _SECTION_HEADERS:
-                continue
-    
-            current_content_type = token
-            boundaries.append(token.get_boundary())
+            if self.content_type or self.section != _SECTION_HEADERS:
+                return False
+
+            self.content_type = token
+            self.boundaries.append(token.get_boundary())
+            return True
 
         elif isinstance(token, Boundary):
             value = token.value[2:]
 
-            if value in boundaries:
+            if value in self.boundaries:
                 token.value = value
                 token.final = False
-                current_section = _SECTION_HEADERS
-                current_content_type = None
+                self.section = _SECTION_HEADERS
+                self.content_type = None
+                return True
 
-            elif _strip_endings(value) in boundaries:
+            elif _strip_endings(value) in self.boundaries:
                 token.value = _strip_endings(value)
                 token.final = True
-                current_section = _SECTION_MULTIPART_EPILOGUE
+                self.section = _SECTION_MULTIPART_EPILOGUE
+                return True
 
-            else:
-                # False boundary detected!
-                continue
+            # False boundary detected!
+            return False
 
         elif token == _EMPTY_LINE:
-            if current_section == _SECTION_HEADERS:
-                if not current_content_type:
-                    current_content_type = _DEFAULT_CONTENT_TYPE
-
-                if current_content_type.is_singlepart():
-                    current_section = _SECTION_BODY
-                elif current_content_type.is_multipart():
-                    current_section = _SECTION_MULTIPART_PREAMBLE
+            if self.section == _SECTION_HEADERS:
+                if not self.content_type:
+                    self.content_type = _DEFAULT_CONTENT_TYPE
+
+                if self.content_type.is_singlepart():
+                    self.section = _SECTION_BODY
+                elif self.content_type.is_multipart():
+                    self.section = _SECTION_MULTIPART_PREAMBLE
                 else:
                     # Start of an enclosed message or just its headers.
-                    current_section = _SECTION_HEADERS
-                    current_content_type = None
+                    self.section = _SECTION_HEADERS
+                    self.content_type = None
 
             # Cast away empty line tokens, for they have been pre-scanned just
             # to identify a place where a header section completes and a body
             # section starts.
-            continue
-        
-        else:
-            raise DecodingError("Unknown token")
+            return False
+
+        raise DecodingError("Unknown token")
+
+
+class _TimedTokenFilter(_TokenFilter):
+    """
+    Token filter that counts the tokens it is fed with and the time spent
+    on telling them apart.
+    """
 
-        filtered.append(token)
+    def __init__(self):
+        _TokenFilter.__init__(self)
+        self.scanned = 0
+        self.elapsed = 0.0
 
-    return filtered
+    def accept(self, token):
+        started = time.time()
+        accepted = _TokenFilter.accept(self, token)
+        self.elapsed += time.time() - started
+        self.scanned += 1
+        return accepted
+
+
+class HeaderBlock(object):
+    """
+    Headers section of a message or part: the effective content type, the
+    position where the section starts, the position where the body starts
+    and the headers, that are parsed on the first access.
+    """
+
+    def __init__(self, string, content_type, start, body_start, headers=None):
+        self.content_type = content_type
+        self.start = start
+        self.body_start = body_start
+        self._string = string
+        self._headers = headers
+        # the scanned tokens of the section and the position where the
+        # scan stopped, set for the blocks that scan can continue from
+        self._tokens = None
+        self._scanned = None
+
+    @property
+    def headers(self):
+        if self._headers is None:
+            self._headers = MimeHeaders.from_stream(StringIO(self._string))
+        return self._headers
+
+    def __repr__(self):
+        return "HeaderBlock({0}, {1}, {2})".format(
+            self.content_type, self.start, self.body_start)
+
+
+class IncrementalScanner(object):
+    """
+    Push-style scanner that accepts the message in chunks as they arrive,
+    e.g. from an SMTP DATA stream:
+
+    >>> scanner = IncrementalScanner()
+    >>> for chunk in chunks:
+    ...     for block in scanner.feed(chunk):
+    ...         check_policy(block.content_type, block.headers)
+    >>> message = scanner.close()
+
+    Complete lines are tokenized as soon as they arrive, so every `feed`
+    returns the header sections (HeaderBlock objects) that have been
+    completed by the chunk, and `close` builds the message tree out of the
+    collected tokens without scanning the message again.
+    """
+
+    def __init__(self):
+        self._buffer = StringIO()
+        self._filter = _TokenFilter()
+        self._tokens = []
+        self._size = 0
+        # the message is tokenized up to this position, the rest of it
+        # (the incomplete line(s)) is kept in the pending chunks
+        self._scanned = 0
+        self._pending = []
+        self._context = ''
+        self._headers_start = 0
+        self._closed = False
+
+    @property
+    def size(self):
+        """Number of bytes fed so far"""
+        return self._size
+
+    def feed(self, chunk):
+        """
+        Feeds the next chunk of the message, returns the list of header
+        sections completed by the chunk.
+        """
+        if self._closed:
+            raise DecodingError("Scanner has been closed")
+
+        self._buffer.write(chunk)
+        self._size += len(chunk)
+        self._pending.append(chunk)
+
+        # scan only complete lines, the chunks are joined only when one of
+        # them completes a line, so long lines are not copied over and over
+        newline = chunk.rfind('\n')
+        if newline == -1:
+            return []
+        tail = ''.join(self._pending)
+        return self._scan(tail, len(tail) - len(chunk) + newline + 1,
+                          final=False)
+
+    def close(self):
+        """
+        Tells the scanner that the whole message has been fed, returns the
+        message tree.
+        """
+        if self._closed:
+            raise DecodingError("Scanner has been closed")
+
+        tail = ''.join(self._pending)
+        self._scan(tail, len(tail), final=True)
+        self._closed = True
+        return build_tree(self._buffer.getvalue(), self._tokens)
+
+    def _scan(self, tail, end, final):
+        # few bytes preceding the tail let boundaries find their newlines
+        string = self._context + tail[:end]
+        offset = self._scanned - len(self._context)
+        last = len(string)
+
+        matches = list(_RE_TOKENIZER.finditer(string, len(self._context)))
+        if matches and not final:
+            # content type header can be folded to the lines yet to come
+            match = matches[-1]
+            if match.group(_CTYPE) and \
+                    not string[match.end():].strip("\r\n"):
+                matches.pop()
+                last = match.start()
+
+        blocks = []
+        for match in matches:
+            token = _make_token(match, string, offset)
+            section = self._filter.section
+            content_type = self._filter.content_type
+            if self._filter.accept(token):
+                self._tokens.append(token)
+                if token.is_boundary() and not token.is_final():
+                    self._headers_start = token.end + 1
+
+            elif token == _EMPTY_LINE and section == _SECTION_HEADERS:
+                body_start = offset + match.end()
+                blocks.append(HeaderBlock(
+                    self._read(self._headers_start, offset + match.start()),
+                    content_type or _DEFAULT_CONTENT_TYPE,
+                    self._headers_start,
+                    body_start))
+                self._headers_start = body_start
+
+        scanned = offset + last
+        tail = tail[scanned - self._scanned:]
+        self._pending = [tail] if tail else []
+        self._context = string[max(0, last - 3):last]
+        self._scanned = scanned
+        return blocks
+
+    def _read(self, start, end):
+        self._buffer.seek(start)
+        string = self._buffer.read(max(0, end - start))
+        self._buffer.seek(0, 2)
+        return string
 
 
 def _strip_endings(value):
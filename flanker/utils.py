@@ -3,13 +3,14 @@
 Utility functions and classes used by flanker.
 """
 import logging
+import multiprocessing
 import re
 
 import cchardet
 import chardet
 
-from flanker.mime.message import errors
 from functools import wraps
+from itertools import count, imap, izip, repeat
 
 
 log = logging.getLogger(__name__)
@@ -36,6 +37,10 @@ def _guess_and_convert_with(value, detector=cchardet):
 
     The detector is either chardet or cchardet module.
     """
+    # flanker.mime imports this module, so errors can not be imported
+    # at the module level
+    from flanker.mime.message import errors
+
     charset = detector.detect(value)
 
     if not charset["encoding"]:
@@ -146,6 +151,45 @@ def metrics_wrapper():
     return decorate
 
 
+def pool_map(fn, iterable, workers=None, ordered=True, chunksize=1):
+    """
+    Applies the function to every item of the iterable in a pool of worker
+    processes and yields the results as they are ready.
+
+    In the ordered mode the results are yielded in the order of the items,
+    otherwise they are yielded as soon as they are ready as (index, result)
+    pairs, where index is the position of the item in the iterable.
+
+    `workers` defaults to the number of CPUs, a single worker applies the
+    function in the current process. Items are sent to the workers in
+    batches of `chunksize` items. The function and the items have to be
+    picklable.
+    """
+    tasks = iterable
+    if not ordered:
+        tasks = izip(repeat(fn), count(), iterable)
+        fn = _apply_indexed
+
+    if workers == 1:
+        for result in imap(fn, tasks):
+            yield result
+        return
+
+    pool = multiprocessing.Pool(workers)
+    try:
+        mapper = pool.imap if ordered else pool.imap_unordered
+        for result in mapper(fn, tasks, chunksize):
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _apply_indexed(task):
+    fn, index, item = task
+    return index, fn(item)
+
+
 # allows, \t\n\v\f\r (0x09-0x0d)
 CONTROL_CHARS = ''.join(map(unichr, range(0, 9) + range(14, 32) + range(127, 160)))
 CONTROL_CHAR_RE = re.compile('[%s]' % re.escape(CONTROL_CHARS))
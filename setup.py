@@ -13,7 +13,8 @@ setup(name='flanker',
       author_email='admin@mailgunhq.com',
       url='http://mailgun.net',
       license='Apache 2',
-      packages=find_packages(exclude=['ez_setup', 'examples', 'tests']),
+      packages=find_packages(exclude=['ez_setup', 'examples', 'tests',
+                                      'benchmarks']),
       include_package_data=True,
       zip_safe=True,
       tests_require=[
@@ -25,9 +26,10 @@ setup(name='flanker',
           'cchardet>=0.3.5',
           'cython>=0.21.1',
           'dnsq>=1.1.6',
+          'dnspython>=1.11.1',
           'expiringdict>=1.1.2',
           'WebOb>=0.9.8',
-          'redis>=2.7.1',
+          'redis>=2.10.0',
           # IMPORTANT! Newer regex versions are a lot slower for
           # mime parsing (100x slower) so keep it as-is for now.
           'regex>=0.1.20110315',
@@ -3,7 +3,8 @@
 from .. import *
 from nose.tools import assert_equal, assert_not_equal
 
-from flanker.addresslib.address import parse, parse_list
+from flanker.addresslib import address
+from flanker.addresslib.address import parse, parse_list, parse_list_many
 from flanker.addresslib.address import Address, AddressList, EmailAddress, UrlAddress
 
 
@@ -158,3 +159,50 @@ def test_display_name__update():
     # Then
     eq_('=?utf-8?b?0J/RgNC40LLQtdGCINCc0LXQtNCy0LXQtA==?= <foo@bar.com>',
         a.full_spec())
+
+
+def test_parse_list_many():
+    lists = ['A <a@b.com>', 'C <d@e.com>, f@g.com', 'bad', None] * 10
+    results = list(parse_list_many(lists, workers=2, chunksize=3))
+    eq_([parse_list(l) for l in lists], results)
+    eq_(['a@b.com'], results[0].addresses)
+
+    results = dict(parse_list_many(lists, as_tuple=True, workers=2,
+                                   ordered=False))
+    eq_(range(len(lists)), sorted(results))
+    eq_(([], ['bad']), results[2])
+
+
+def test_parse_cache():
+    address.enable_parse_cache(size=2)
+    try:
+        a = parse('Bob <bob@example.com>')
+        b = parse('Bob <bob@example.com>')
+        eq_(a, b)
+        # cached results are copies
+        ok_(a is not b)
+        b.display_name = u'Alice'
+        eq_(u'Bob', parse('Bob <bob@example.com>').display_name)
+
+        eq_(None, parse('foo'))
+        eq_(None, parse('foo'))
+        eq_('bob@example.com',
+            parse('Bob <bob@example.com>', addr_spec_only=False).address)
+        eq_(None, parse('Bob <bob@example.com>', addr_spec_only=True))
+
+        p, u = parse_list('a@b.com, foo, c@d.com', as_tuple=True)
+        p.append(parse('e@f.com'))
+        u.append('bar')
+        eq_((['a@b.com', 'c@d.com'], ['foo']),
+            parse_list('a@b.com, foo, c@d.com', as_tuple=True))
+
+        stats = address.parse_cache_stats()
+        eq_(2, stats['size'])
+        ok_(stats['hits'] >= 5)
+        ok_(stats['evictions'] >= 1)
+
+        address.enable_parse_cache(size=1)
+        eq_(1, address.parse_cache_stats()['size'])
+    finally:
+        address.disable_parse_cache()
+    eq_(None, address.parse_cache_stats())
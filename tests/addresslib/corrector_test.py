@@ -3,6 +3,7 @@
 import re
 import string
 import random
+import tempfile
 
 from .. import *
 
@@ -221,3 +222,82 @@ def test_suggest_alternate_invalid():
     print 'alternative invalid: accuracy: {0}, correct: {1}, total: {2}'.\
         format(accuracy, sugg_correct, sugg_total)
     ok_(accuracy > 0.60)
+
+
+def test_indexed_corrector_matches_linear():
+    linear = corrector.DomainCorrector(
+        corrector.MOST_COMMON_DOMAINS, corrector.LOOKUP_TABLE)
+    indexed = corrector.DomainCorrector(
+        corrector.MOST_COMMON_DOMAINS, corrector.LOOKUP_TABLE,
+        linear_limit=0)
+    ok_(linear.index is None)
+    ok_(indexed.index is not None)
+
+    for line in (DOMAIN_TYPO_VALID_TESTS + DOMAIN_TYPO_INVALID_TESTS).split('\n'):
+        line = line.strip()
+        if line == '' or COMMENT.match(line):
+            continue
+        typo = line.split(',')[0]
+        assert_equal(linear.suggest(typo), indexed.suggest(typo))
+
+
+def test_indexed_corrector_matches_linear_randomized():
+    rnd = random.Random(0)
+
+    def random_domain():
+        # few letters, so that the domains and the typos are alike
+        label = ''.join(rnd.choice('abdlnprwz')
+                        for _ in xrange(rnd.randint(2, 12)))
+        return label + rnd.choice(['.com', '.net', '.co', '.om'])
+
+    def typo(domain):
+        chars = list(domain)
+        for _ in xrange(rnd.randint(0, 5)):
+            i = rnd.randint(0, len(chars) - 1)
+            edit = rnd.choice(['insert', 'delete', 'replace', 'swap'])
+            if edit == 'insert':
+                chars.insert(i, rnd.choice('abdlnprwz.'))
+            elif edit == 'delete' and len(chars) > 1:
+                del chars[i]
+            elif edit == 'replace':
+                chars[i] = rnd.choice('abdlnprwz.')
+            elif edit == 'swap' and i + 1 < len(chars):
+                chars[i], chars[i + 1] = chars[i + 1], chars[i]
+        return ''.join(chars)
+
+    # the ratio of these two is 0.8, yet they share 6 of 14 bigrams
+    domains = ['zfpdwlnr.com'] + [random_domain() for _ in xrange(400)]
+    linear = corrector.DomainCorrector(domains, linear_limit=len(domains))
+    indexed = corrector.DomainCorrector(domains, linear_limit=100)
+    ok_(linear.index is None)
+    ok_(indexed.index is not None)
+
+    words = ['zfpwdlnlrc.om'] + [typo(rnd.choice(domains))
+                                 for _ in xrange(100)]
+    words += [random_domain() for _ in xrange(20)]
+    for cutoff in (0.6, 0.77, 0.9):
+        for word in words:
+            assert_equal(linear.suggest(word, cutoff),
+                         indexed.suggest(word, cutoff))
+    assert_equal('zfpdwlnr.com', indexed.suggest('zfpwdlnlrc.om'))
+
+
+def test_corrector_from_file():
+    with tempfile.NamedTemporaryFile() as f:
+        f.write('# popular domains\nexample.com\n\nMailgun.net\nexample.com\n')
+        f.flush()
+        domains = corrector.DomainCorrector.from_file(f.name)
+    assert_equal(['example.com', 'mailgun.net'], domains.domains)
+    assert_equal('mailgun.net', domains.suggest('mailgun.nt'))
+    assert_equal('mailgun.net', domains.suggest('mailgun.nt'))
+    assert_equal('foo.com', domains.suggest('foo.com'))
+    assert_equal(1, domains.memo.stats()['hits'])
+
+    default = corrector._corrector
+    try:
+        corrector.set_corrector(domains)
+        assert_equal('username@example.com',
+                     validate.suggest_alternate('username@exmaple.com'))
+        assert_equal(None, validate.suggest_alternate('username@gmal.com'))
+    finally:
+        corrector.set_corrector(default)
@@ -0,0 +1,195 @@
+# coding:utf-8
+import threading
+import time
+
+import dns.exception
+import dns.name
+import dns.resolver
+from nose.tools import assert_equal
+from mock import patch, Mock, MagicMock
+
+from flanker.addresslib.drivers.dns_lookup import CachingDNSLookup
+from flanker.addresslib.drivers.redis_driver import RedisCache
+from flanker.addresslib.drivers.tiered_cache import TieredCache
+
+
+def test_tiered_cache():
+    backend = CountingCache({'mailgun.com': 'mx.mailgun.com'})
+    cache = TieredCache(backend, size=2)
+
+    assert_equal('mx.mailgun.com', cache['mailgun.com'])
+    assert_equal('mx.mailgun.com', cache['mailgun.com'])
+    assert_equal(None, cache['example.com'])
+    # the second read is served locally, misses are not cached
+    assert_equal(2, backend.reads)
+
+    cache['example.com'] = 'False'
+    assert_equal('False', backend['example.com'])
+    cache['gmail.com'] = 'mx.gmail.com'
+    assert_equal({'hits': 1, 'misses': 2, 'evictions': 1, 'size': 2},
+                 cache.stats())
+
+    del cache['gmail.com']
+    assert_equal(None, cache['gmail.com'])
+
+
+def test_tiered_cache_negative_ttl():
+    backend = CountingCache({'example.com': 'False', 'mailgun.com': 'mx'})
+    cache = TieredCache(backend, ttl=300, negative_ttl=60)
+    with patch('flanker.cache.time.time') as now:
+        now.return_value = 0
+        cache['example.com']
+        cache['mailgun.com']
+        now.return_value = 100
+        cache['example.com']
+        cache['mailgun.com']
+    # only the negative entry has expired
+    assert_equal(3, backend.reads)
+
+
+def test_tiered_cache_batches():
+    backend = CountingCache({'a.com': 'mx.a.com', 'b.com': 'mx.b.com'})
+    cache = TieredCache(backend)
+    cache['a.com']
+    assert_equal({'a.com': 'mx.a.com', 'b.com': 'mx.b.com'},
+                 cache.get_many(['a.com', 'b.com', 'c.com']))
+    assert_equal([['b.com', 'c.com']], backend.batches)
+
+    cache.set_many({'c.com': 'mx.c.com'})
+    assert_equal('mx.c.com', backend['c.com'])
+    assert_equal({'c.com': 'mx.c.com'}, cache.get_many(['c.com']))
+
+
+class CountingCache(dict):
+    def __init__(self, *args):
+        dict.__init__(self, *args)
+        self.reads = 0
+        self.batches = []
+
+    def __getitem__(self, key):
+        self.reads += 1
+        return self.get(key)
+
+    def get_many(self, keys):
+        self.batches.append(keys)
+        return dict((k, self.get(k)) for k in keys if k in self)
+
+
+def test_redis_cache_iteration():
+    cache = RedisCache(prefix='p:', scan_count=2)
+    cache.r = Mock()
+    cache.r.scan_iter.side_effect = lambda *args: iter(['p:a', 'p:b', 'p:c'])
+    cache.r.mget.side_effect = lambda keys: [k.upper() for k in keys]
+    assert_equal(['P:A', 'P:B', 'P:C'], [value for value in cache])
+    cache.r.scan_iter.assert_called_once_with('p:*', 2)
+    assert_equal(2, cache.r.mget.call_count)
+    assert_equal(3, len(cache))
+
+
+def test_redis_cache_unavailable():
+    # nothing listens on the port, lookups degrade to cache misses
+    cache = RedisCache(port=1, socket_connect_timeout=0.1)
+    assert_equal(None, cache['mailgun.com'])
+    assert_equal({}, cache.get_many(['mailgun.com']))
+    assert_equal([], list(cache))
+    assert_equal(0, len(cache))
+
+
+def test_caching_dns_lookup():
+    resolver = Mock()
+    resolver.query.side_effect = lambda name, rdtype: answer(300, [
+        (20, 'mx3.mailgun.com.'), (10, 'mx1.mailgun.com.'),
+        (10, 'mx2.mailgun.com.')])
+    lookup = CachingDNSLookup(resolver=resolver, max_ttl=100)
+
+    with patch('flanker.cache.time.time') as now:
+        now.return_value = 0
+        hosts = lookup['mailgun.com.']
+        assert_equal(set(['mx1.mailgun.com', 'mx2.mailgun.com']),
+                     set(hosts[:2]))
+        assert_equal('mx3.mailgun.com', hosts[2])
+        assert_equal(hosts, lookup['mailgun.com.'])
+        assert_equal(1, resolver.query.call_count)
+
+        # changing the returned list does not change the cached one
+        hosts.pop()
+        assert_equal(3, len(lookup['mailgun.com.']))
+
+        # the record ttl is capped by max_ttl
+        now.return_value = 101
+        lookup['mailgun.com.']
+        assert_equal(2, resolver.query.call_count)
+
+    stats = lookup.stats()
+    assert_equal(2, stats['noerror'])
+    assert_equal(2, stats['hits'])
+
+
+def test_caching_dns_lookup_failures():
+    resolver = Mock()
+    lookup = CachingDNSLookup(resolver=resolver, negative_ttl=60, retries=2)
+
+    resolver.query.side_effect = dns.resolver.NXDOMAIN
+    assert_equal([], lookup['typo.con.'])
+    assert_equal([], lookup['typo.con.'])
+    # nonexistent domains are not retried and are cached
+    assert_equal(1, resolver.query.call_count)
+
+    resolver.query.side_effect = dns.exception.Timeout
+    assert_equal([], lookup['slow.com.'])
+    assert_equal(4, resolver.query.call_count)
+
+    resolver.query.side_effect = dns.resolver.NoAnswer
+    assert_equal(['example.com'], lookup['example.com.'])
+
+    stats = lookup.stats()
+    assert_equal(1, stats['nxdomain'])
+    assert_equal(1, stats['timeout'])
+    assert_equal(1, stats['nodata'])
+    assert_equal(1, stats['hits'])
+
+    later = time.time() + 61
+    with patch('flanker.cache.time.time') as now:
+        now.return_value = later
+        lookup['typo.con.']
+        assert_equal(6, resolver.query.call_count)
+
+
+def test_caching_dns_lookup_coalescing():
+    started = threading.Event()
+    release = threading.Event()
+
+    def query(name, rdtype):
+        started.set()
+        release.wait()
+        return answer(300, [(10, 'mx.mailgun.com.')])
+
+    resolver = Mock()
+    resolver.query.side_effect = query
+    lookup = CachingDNSLookup(resolver=resolver)
+
+    results = []
+    threads = [threading.Thread(
+        target=lambda: results.append(lookup['mailgun.com.']))
+        for _ in range(5)]
+    threads[0].start()
+    started.wait()
+    for t in threads[1:]:
+        t.start()
+    while lookup.stats()['coalesced'] < 4:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert_equal([['mx.mailgun.com']] * 5, results)
+    assert_equal(1, resolver.query.call_count)
+
+
+def answer(ttl, records):
+    result = MagicMock()
+    result.rrset.ttl = ttl
+    result.__iter__ = lambda self: iter(
+        [Mock(preference=p, exchange=dns.name.from_text(e))
+         for p, e in records])
+    return result
@@ -5,7 +5,9 @@ from mock import patch
 from nose.tools import assert_equal, assert_not_equal
 from nose.tools import nottest
 
+import flanker.addresslib
 from flanker.addresslib import address, validate
+from tests.addresslib.validator_test import NullCache
 
 @nottest
 def mock_exchanger_lookup(arg, metrics=False):
@@ -55,7 +57,8 @@ def test_metrics_validate_address():
 
 def test_metrics_validate_list():
     # validate_list
-    with patch.object(validate, 'mail_exchanger_lookup') as mock_method:
+    with patch.object(flanker.addresslib, 'mx_cache', NullCache()), \
+            patch.object(validate, 'resolve_mail_exchanger') as mock_method:
         mock_method.side_effect = mock_exchanger_lookup
 
         assert_equal(len(address.validate_list('foo@mailgun.org, bar@mailgun.org', metrics=True)), 2)
@@ -1,7 +1,12 @@
 # coding:utf-8
 
 import email.header
+import re
 
+from .. import (MAILBOX_VALID_TESTS, MAILBOX_INVALID_TESTS,
+                ABRIDGED_LOCALPART_VALID_TESTS,
+                ABRIDGED_LOCALPART_INVALID_TESTS)
+from flanker.addresslib import address, parser
 from flanker.addresslib.address import is_email
 from flanker.mime.message.headers.encodedword import mime_to_unicode
 from mock import patch, Mock
@@ -21,3 +26,44 @@ def test_header_to_unicode():
     assert_equal(u'Eugueny ώ Kontsevoy', mime_to_unicode("=?UTF-8?Q?Eugueny_=CF=8E_Kontsevoy?=") )
     assert_equal(u'hello', mime_to_unicode("hello"))
     assert_equal(None, mime_to_unicode(None))
+
+
+def test_fast_path_matches_full_grammar():
+    mailboxes = [line.strip() for line in
+                 (MAILBOX_VALID_TESTS + MAILBOX_INVALID_TESTS).split('\n')
+                 if line.strip() and not line.strip().startswith('#')]
+    mailboxes += [line.strip() + '@example.com' for line in
+                  (ABRIDGED_LOCALPART_VALID_TESTS +
+                   ABRIDGED_LOCALPART_INVALID_TESTS).split('\n')
+                  if line.strip() and not line.strip().startswith('#')]
+
+    samples = []
+    for mbox in mailboxes:
+        samples += [mbox, ' \t' + mbox + ' ', u'' + mbox.decode('utf-8'),
+                    'Bob <' + mbox + '>', '  Bob  Smith\t<' + mbox + '>  ',
+                    '"Smith, Bob" <' + mbox + '>', "'Bob' <" + mbox + '>',
+                    '<' + mbox + '>', 'Bob<' + mbox + '>', mbox + ' Bob',
+                    '"Bob"x <' + mbox + '>', mbox + ', ' + mbox,
+                    'Bob <' + mbox + '>; x, ' + mbox]
+
+    never = re.compile('(?!)')
+    for sample in samples:
+        fast = _parse_results(sample)
+        with patch.object(parser, 'FAST_ADDRESS', never), \
+                patch.object(parser, 'FAST_ADDR_SPEC', never):
+            full = _parse_results(sample)
+        assert_equal(full, fast, sample)
+
+
+def _parse_results(sample):
+    def summary(addr):
+        if addr is None:
+            return None
+        return (type(addr), type(addr.address), addr.address,
+                getattr(addr, 'display_name', None))
+
+    relaxed, unparsed = address.parse_list(sample, as_tuple=True)
+    return (summary(address.parse(sample)),
+            summary(address.parse(sample, addr_spec_only=True)),
+            [summary(a) for a in relaxed], unparsed,
+            [summary(a) for a in address.parse_list(sample, strict=True)])
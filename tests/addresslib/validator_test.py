@@ -1,15 +1,19 @@
 # coding:utf-8
 
 import re
+import socket
+import time
 
 from .. import *
 
-from nose.tools import assert_equal, assert_not_equal
+from nose.tools import assert_equal, assert_not_equal, assert_less
 from nose.tools import nottest
-from mock import patch
+from mock import patch, Mock
 
+import flanker.addresslib
 from flanker.addresslib import address
 from flanker.addresslib import validate
+from flanker.addresslib.drivers.redis_driver import RedisCache
 
 
 COMMENT = re.compile(r'''\s*#''')
@@ -148,7 +152,8 @@ def test_parse_syntax_only_false():
     all_list = all_valid_list + all_invalid_list
 
     # all valid
-    with patch.object(validate, 'mail_exchanger_lookup') as mock_method:
+    with patch.object(flanker.addresslib, 'mx_cache', NullCache()), \
+            patch.object(validate, 'resolve_mail_exchanger') as mock_method:
         mock_method.side_effect = mock_exchanger_lookup
 
         parse, unpar = address.validate_list(', '.join(valid_tld_list), as_tuple=True)
@@ -240,3 +245,265 @@ def test_validate_address_metrics():
         assert_equal(metrics['mx_lookup'], 10)
         assert_equal(metrics['dns_lookup'], 20)
         assert_equal(metrics['mx_conn'], 30)
+
+
+def test_mx_lookup_many():
+    # a local listener plays the mail exchanger, a dict plays the dns
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(16)
+    dns = {'mailgun.com.': ['127.0.0.1'], 'example.com.': []}
+    try:
+        with patch.object(validate, 'SMTP_PORT', listener.getsockname()[1]), \
+                patch.object(flanker.addresslib, 'dns_lookup', dns), \
+                patch.object(flanker.addresslib, 'mx_cache', NullCache()), \
+                patch.object(validate, 'lookup_domain',
+                             wraps=validate.lookup_domain) as lookup:
+            exchangers, mtimes = validate.mail_exchanger_lookup_many(
+                ['mailgun.com', 'example.com', 'mailgun.com'],
+                concurrency=4, metrics=True)
+            assert_equal(
+                {'mailgun.com': '127.0.0.1', 'example.com': None},
+                exchangers)
+            assert_equal(set(['mx_lookup', 'dns_lookup', 'mx_conn']),
+                         set(mtimes))
+            # every domain is looked up once, domains without mx twice
+            assert_equal(3, lookup.call_count)
+
+            parse, unpar = address.validate_list(
+                'a@mailgun.com, b@example.com, c@mailgun.com',
+                as_tuple=True, concurrency=4)
+            assert_equal(['a@mailgun.com', 'c@mailgun.com'], parse)
+            assert_equal(['b@example.com'], unpar)
+    finally:
+        listener.close()
+
+
+class NullCache(dict):
+    def __getitem__(self, key):
+        return None
+
+    def __setitem__(self, key, value):
+        pass
+
+
+def test_mx_lookup_many_batches_cache_reads():
+    cache = BatchCache({'mailgun.com': 'mx.mailgun.com',
+                        'example.com': 'False'})
+    with patch.object(flanker.addresslib, 'mx_cache', cache), \
+            patch.object(validate, 'resolve_mail_exchanger') as lookup:
+        lookup.side_effect = mock_exchanger_lookup
+        exchangers = validate.mail_exchanger_lookup_many(
+            ['mailgun.com', 'example.com', 'mailgun.org', 'mailgun.net'] * 100)
+        assert_equal({'mailgun.com': 'mx.mailgun.com',
+                      'example.com': None,
+                      'mailgun.org': '',
+                      'mailgun.net': None}, exchangers)
+        # one batch read, only the missing domains are looked up
+        assert_equal(1, cache.batches)
+        assert_equal(2, lookup.call_count)
+        # one batch write of the domains with a mail exchanger
+        assert_equal([{'mailgun.org': ''}], cache.writes)
+
+
+def test_redis_cache_batches():
+    cache = RedisCache(prefix='p:', ttl=10)
+    cache.r = Mock()
+    cache.r.mget.return_value = ['a', None]
+    assert_equal({'x': 'a'}, cache.get_many(['x', 'y']))
+    cache.r.mget.assert_called_once_with(['p:x', 'p:y'])
+
+    cache.set_many({'x': 'a'})
+    cache.r.pipeline.return_value.setex.assert_called_once_with('p:x', 10, 'a')
+    cache.r.pipeline.return_value.execute.assert_called_once_with()
+
+    # a broken redis is a cache miss
+    cache.r.mget.side_effect = Exception
+    assert_equal({}, cache.get_many(['x']))
+
+
+class BatchCache(dict):
+    batches = 0
+
+    def __init__(self, *args):
+        dict.__init__(self, *args)
+        self.writes = []
+
+    def get_many(self, keys):
+        self.batches += 1
+        return dict((k, self[k]) for k in keys if k in self)
+
+    def set_many(self, mapping):
+        self.writes.append(mapping)
+        self.update(mapping)
+
+
+def test_connect_to_mail_exchanger():
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(16)
+    validate.mx_host_cache.clear()
+    try:
+        with patch.object(validate, 'SMTP_PORT', listener.getsockname()[1]):
+            # nothing listens on the other loopback address
+            assert_equal('127.0.0.1', validate.connect_to_mail_exchanger(
+                ['127.0.0.2', '127.0.0.1'], stagger=10))
+            assert_equal(False, validate.mx_host_cache.get('127.0.0.2'))
+            assert_equal(True, validate.mx_host_cache.get('127.0.0.1'))
+
+            # the dead host is not probed again, the live one is not
+            # probed at all
+            with patch.object(validate, '_start_probe') as probe:
+                assert_equal('127.0.0.1', validate.connect_to_mail_exchanger(
+                    ['127.0.0.3', '127.0.0.2', '127.0.0.1']))
+                assert_equal(0, probe.call_count)
+                assert_equal(None, validate.connect_to_mail_exchanger(
+                    ['127.0.0.2']))
+                assert_equal(0, probe.call_count)
+    finally:
+        listener.close()
+        validate.mx_host_cache.clear()
+
+
+def stuck_socket(peers):
+    """Returns a socket that never becomes writable, its peer is added to
+    `peers`"""
+    sock, peer = socket.socketpair()
+    peers.append(peer)
+    sock.setblocking(0)
+    try:
+        while True:
+            sock.send('x' * 65536)
+    except socket.error:
+        pass
+    return sock
+
+
+def is_closed(peer):
+    """Tells if the other end of the peer is closed"""
+    peer.settimeout(1)
+    try:
+        while peer.recv(65536):
+            pass
+    except socket.timeout:
+        return False
+    return True
+
+
+def test_connect_to_mail_exchanger_stagger():
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(16)
+    peers = []
+
+    def start_probe(host):
+        if host.startswith('slow'):
+            return stuck_socket(peers)
+        return start_probe.original(host)
+    start_probe.original = validate._start_probe
+
+    validate.mx_host_cache.clear()
+    try:
+        with patch.object(validate, 'SMTP_PORT', listener.getsockname()[1]), \
+                patch.object(validate, '_start_probe', start_probe):
+            # the second host is tried before the first one times out,
+            # the losing attempt is closed
+            start = time.time()
+            assert_equal('127.0.0.1', validate.connect_to_mail_exchanger(
+                ['slow1.example.com', '127.0.0.1'], timeout=1, stagger=0.05))
+            assert_less(time.time() - start, 0.5)
+            ok_(is_closed(peers[0]))
+
+            # a failure starts the next host while others are in flight
+            start = time.time()
+            assert_equal('127.0.0.1', validate.connect_to_mail_exchanger(
+                ['slow2.example.com', '127.0.0.2', '127.0.0.1'],
+                timeout=5, stagger=0.3))
+            assert_less(time.time() - start, 0.5)
+
+            # all the attempts are given up after the total timeout
+            start = time.time()
+            assert_equal(None, validate.connect_to_mail_exchanger(
+                ['slow3.example.com'], timeout=1, total_timeout=0.1))
+            assert_less(time.time() - start, 0.5)
+            ok_(is_closed(peers[-1]))
+    finally:
+        listener.close()
+        for peer in peers:
+            peer.close()
+        validate.mx_host_cache.clear()
+
+
+def test_plugin_for_esp():
+    from flanker.addresslib.plugins import yahoo, gmail, aol, icloud, hotmail, google
+
+    eq_(yahoo, validate.plugin_for_esp('mta5.am0.yahoodns.net'))
+    eq_(gmail, validate.plugin_for_esp('alt1.gmail-smtp-in.l.google.com'))
+    eq_(aol, validate.plugin_for_esp('mailin-01.mx.aol.com'))
+    eq_(icloud, validate.plugin_for_esp('mx1.mail.icloud.com'))
+    eq_(hotmail, validate.plugin_for_esp('mx3.hotmail.com'))
+    eq_(google, validate.plugin_for_esp('ALT1.ASPMX.L.GOOGLE.COM'))
+    eq_(google, validate.plugin_for_esp('aspmx2.googlemail.com'))
+    eq_(None, validate.plugin_for_esp('mx.example.com'))
+    eq_(None, validate.plugin_for_esp('mta5.am0.yahoodns.net.example.com'))
+
+
+def test_register_plugin():
+    plugin, other = Mock(), Mock()
+    grammars = list(flanker.addresslib.CUSTOM_GRAMMAR_LIST)
+    try:
+        eq_(None, validate.plugin_for_esp('mx1.example.com'))
+
+        flanker.addresslib.register_plugin(r'mx[0-9]+\.example\.com$', plugin)
+        flanker.addresslib.register_plugin(r'mx1\.example\.com$', other)
+        eq_(plugin, validate.plugin_for_esp('mx1.example.com'))
+        eq_(plugin, validate.plugin_for_esp('mx1.example.com'))
+        eq_(None, validate.plugin_for_esp('mx.example.com'))
+        # the registered plugins are not added to the module level list
+        eq_(grammars, flanker.addresslib.CUSTOM_GRAMMAR_LIST)
+
+        # patterns that can not be combined are matched one by one
+        flanker.addresslib.register_plugin(r'(?P<a>mx)\.example\.org$', plugin)
+        flanker.addresslib.register_plugin(r'(?P<a>mx)\.example\.net$', other)
+        eq_(other, validate.plugin_for_esp('mx.example.net'))
+
+        # direct changes to the list are picked up by reset
+        flanker.addresslib.CUSTOM_GRAMMAR_LIST.append(
+            (re.compile(r'mx\.example\.info$'), plugin))
+        validate.plugin_dispatcher.reset()
+        eq_(plugin, validate.plugin_for_esp('mx.example.info'))
+        eq_(None, validate.plugin_for_esp('mx1.example.com'))
+    finally:
+        flanker.addresslib.CUSTOM_GRAMMAR_LIST[:] = grammars
+        validate.plugin_dispatcher.reset()
+    eq_(None, validate.plugin_for_esp('mx.example.info'))
+
+
+def test_plugin_dispatcher_rebuilds_on_register():
+    dispatcher = validate.PluginDispatcher()
+    eq_(None, dispatcher.plugin_for('mx.example.com'))
+    matchers = dispatcher._matchers
+    dispatcher.plugin_for('mx.example.com')
+    ok_(matchers is dispatcher._matchers)
+
+    plugin = Mock()
+    dispatcher.register(r'mx\.example\.com$', plugin)
+    eq_(1, dispatcher.version)
+    eq_(plugin, dispatcher.plugin_for('mx.example.com'))
+    ok_(matchers is not dispatcher._matchers)
+
+
+def test_plugin_dispatcher_group_numbers():
+    # the patterns that refer to the groups by number are not combined
+    plugin, other = Mock(), Mock()
+    dispatcher = validate.PluginDispatcher()
+    dispatcher.register(r'mx\.example\.com$', other)
+    dispatcher.register(r'(mx)\.\1\.example\.net$', plugin)
+    dispatcher.register(r'(a)?(?(1)b|c)\.example\.net$', other)
+    dispatcher.register(r'mx\.example\.org$', plugin)
+    eq_(plugin, dispatcher.plugin_for('mx.mx.example.net'))
+    eq_(None, dispatcher.plugin_for('mx.my.example.net'))
+    eq_(other, dispatcher.plugin_for('ab.example.net'))
+    eq_(other, dispatcher.plugin_for('c.example.net'))
+    eq_(None, dispatcher.plugin_for('ac.example.net'))
+    eq_(plugin, dispatcher.plugin_for('mx.example.org'))
@@ -0,0 +1,37 @@
+# coding:utf-8
+
+from nose.tools import eq_, ok_
+from mock import patch
+
+from flanker.cache import LRUCache
+
+
+def lru_cache_test():
+    cache = LRUCache(size=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    eq_(1, cache.get('a'))
+    # 'b' is the least recently used item now
+    cache.set('c', 3)
+    eq_(None, cache.get('b'))
+    eq_(3, cache.get('c'))
+    eq_({'hits': 2, 'misses': 1, 'evictions': 1, 'size': 2}, cache.stats())
+
+    cache.resize(1)
+    eq_(1, len(cache))
+    ok_('c' in cache)
+    cache.delete('c')
+    eq_('x', cache.get('c', 'x'))
+
+
+def lru_cache_ttl_test():
+    cache = LRUCache(ttl=10)
+    with patch('flanker.cache.time.time') as now:
+        now.return_value = 100
+        cache.set('a', 1)
+        cache.set('b', 2, ttl=20)
+        cache.set('c', 3, ttl=0)
+        ok_('c' not in cache)
+        now.return_value = 115
+        eq_(None, cache.get('a'))
+        eq_(2, cache.get('b'))
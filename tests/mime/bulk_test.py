@@ -0,0 +1,37 @@
+# coding:utf-8
+from nose.tools import ok_, eq_
+from flanker import mime
+from flanker.mime import create
+from flanker.mime.message.errors import DecodingError
+from tests import ENCLOSED, TORTURE, MULTIPART, BOUNCE
+
+
+def test_parse_many_ordered():
+    strings = [ENCLOSED, TORTURE, MULTIPART, BOUNCE] * 3
+    summaries = list(mime.parse_many(strings, workers=2, chunksize=2))
+    eq_(len(strings), len(summaries))
+
+    for string, summary in zip(strings, summaries):
+        message = create.from_string(string)
+        eq_([str(p.content_type) for p in message.walk(with_self=True)],
+            [s.content_type for s in summary.walk(with_self=True)])
+        for part, s in zip(message.walk(with_self=True),
+                           summary.walk(with_self=True)):
+            eq_(part.headers.items(), s.headers)
+            eq_(part.content_type.params, s.params)
+            eq_(part._container.read_body(), string[s.body_start:s.end + 1])
+
+
+def test_parse_many_unordered():
+    strings = [ENCLOSED, "Content-Type: multipart/mixed\r\n\r\nhello", BOUNCE]
+    results = dict(mime.parse_many(strings, workers=2, ordered=False))
+    eq_([0, 1, 2], sorted(results))
+    eq_('multipart/mixed', results[0].content_type)
+    ok_(isinstance(results[1], DecodingError))
+    eq_('multipart/report', results[2].content_type)
+
+
+def test_parse_many_in_process():
+    summaries = list(mime.parse_many([TORTURE, MULTIPART], workers=1))
+    eq_(['multipart/mixed', 'multipart/alternative'],
+        [s.content_type for s in summaries])
@@ -0,0 +1,95 @@
+# coding:utf-8
+import os
+import tempfile
+
+from nose.tools import eq_, assert_raises
+from mock import patch
+from flanker import mime
+from flanker.mime import create, index
+from flanker.mime.message import scanner
+from flanker.mime.message.errors import DecodingError, EncodingError
+from tests import ENCLOSED, TORTURE, MULTIPART, BOUNCE, NO_CTYPE, AOL_FBL
+
+
+def tree(message):
+    return [(p.content_type, p.content_type.params,
+             p._container.start, p._container.end)
+            for p in message.walk(with_self=True)]
+
+
+def test_index_round_trip():
+    for string in (ENCLOSED, TORTURE, MULTIPART, BOUNCE, NO_CTYPE, AOL_FBL):
+        with patch.object(scanner, '_iter_tokens',
+                          wraps=scanner._iter_tokens) as iter_tokens:
+            message = create.from_string(string)
+            eq_(1, iter_tokens.call_count)
+            blob = mime.dump_index(message)
+
+            iter_tokens.reset_mock()
+            loaded = create.from_string(string, index=blob)
+            eq_(0, iter_tokens.call_count)
+
+        eq_(tree(message), tree(loaded))
+        eq_([p.headers.items() for p in message.walk(with_self=True)],
+            [p.headers.items() for p in loaded.walk(with_self=True)])
+        eq_(string, loaded.to_string())
+
+
+def test_index_from_file():
+    message = create.from_string(ENCLOSED, lazy=True)
+    blob = mime.dump_index(message)
+
+    fd, path = tempfile.mkstemp()
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(ENCLOSED)
+        loaded = create.from_file(path, index=blob)
+        eq_(tree(message), tree(loaded))
+        eq_(message.parts[0].body, loaded.parts[0].body)
+    finally:
+        os.remove(path)
+
+
+def test_index_checks():
+    blob = mime.dump_index(create.from_string(ENCLOSED))
+
+    # the message has changed
+    assert_raises(DecodingError, create.from_string, ENCLOSED + '\r\n',
+                  index=blob)
+    assert_raises(DecodingError, create.from_string,
+                  ENCLOSED.replace('Bob', 'Rob', 1), index=blob)
+
+    # the index is broken
+    assert_raises(DecodingError, create.from_string, ENCLOSED, index='')
+    assert_raises(DecodingError, create.from_string, ENCLOSED,
+                  index='XXXX' + blob[4:])
+    assert_raises(DecodingError, create.from_string, ENCLOSED,
+                  index=blob[:-10])
+    assert_raises(DecodingError, create.from_string, ENCLOSED,
+                  index=blob[:4] + chr(index.VERSION + 1) + blob[5:])
+
+
+def test_index_checks_large_message():
+    string = ENCLOSED.replace('\r\n\r\n', '\r\n\r\n' + 'x' * 10000, 1)
+    blob = mime.dump_index(create.from_string(string))
+    head = string.replace('Bob', 'Rob', 1)
+    tail = string[:-3] + 'XX' + string[-1:]
+    middle = string[:6000] + 'y' + string[6001:]
+
+    # the whole message is checked by default
+    for changed in (head, tail, middle):
+        assert_raises(DecodingError, create.from_string, changed, index=blob)
+
+    # the ends only, the middle of the message is not checked
+    for changed in (head, tail):
+        assert_raises(DecodingError, create.from_string, changed,
+                      index=blob, strict_index=False)
+    eq_(middle, create.from_string(middle, index=blob,
+                                   strict_index=False).to_string())
+
+
+def test_index_of_created_message():
+    message = create.from_string(MULTIPART)
+    message.append(create.text('plain', u'appended'))
+    assert_raises(EncodingError, mime.dump_index, message)
+    assert_raises(EncodingError, mime.dump_index, create.text('plain', u'hi'))
@@ -0,0 +1,102 @@
+# coding:utf-8
+from cStringIO import StringIO
+
+from nose.tools import ok_, eq_
+from flanker import mime
+from flanker.mime import create
+from flanker.mime.instrumentation import Aggregator, StageStats
+from flanker.mime.message import scanner
+from tests import ENCLOSED, MULTIPART
+
+
+class Recorder(object):
+
+    def __init__(self):
+        self.records = []
+
+    def record(self, stage, seconds, **counts):
+        self.records.append((stage, counts))
+
+
+def test_stages():
+    hook = Recorder()
+    message = create.from_string(MULTIPART, hook=hook)
+    eq_(['tokenize', 'filter', 'traverse'], [r[0] for r in hook.records])
+
+    tokenize, filter, traverse = [r[1] for r in hook.records]
+    ok_(tokenize['scanned'] > 0)
+    eq_(tokenize['scanned'], filter['scanned'])
+    eq_(len(scanner.tokenize(MULTIPART)),
+        filter['scanned'] - filter['filtered'])
+    eq_({'parts': 4}, traverse)
+
+    # headers and bodies are recorded as they are accessed
+    del hook.records[:]
+    part = message.parts[0]
+    part.body
+    part.body
+    eq_(['headers', 'body'], [r[0] for r in hook.records])
+    headers, body = [r[1] for r in hook.records]
+    eq_(part._container._body_start - part._container.start,
+        headers['bytes'])
+    eq_(len(part.headers), headers['headers'])
+    eq_(len(part._container.read_body()), body['bytes'])
+    eq_(len(part.body), body['decoded'])
+
+
+def test_lazy_and_index_stages():
+    hook = Recorder()
+    message = create.from_string(ENCLOSED, lazy=True, hook=hook)
+    eq_([], hook.records)
+    message.parts[1].enclosed.parts[0].body
+    ok_('body' in [r[0] for r in hook.records])
+
+    hook = Recorder()
+    blob = mime.dump_index(create.from_string(ENCLOSED))
+    message = create.from_string(ENCLOSED, index=blob, hook=hook)
+    message.headers
+    eq_(['headers'], [r[0] for r in hook.records])
+
+
+def test_no_hook():
+    message = create.from_string(MULTIPART)
+    ok_(all(p._container.hook is None for p in message.walk(with_self=True)))
+    eq_(MULTIPART, message.to_string())
+
+
+def test_aggregator():
+    stats = Aggregator()
+    for _ in xrange(3):
+        message = create.from_string(MULTIPART, hook=stats)
+        for part in message.walk():
+            part.body
+    eq_(set(['tokenize', 'filter', 'traverse', 'headers', 'body']),
+        set(stats.stages))
+    eq_(3, stats.stages['traverse'].calls)
+    eq_(12, stats.stages['traverse'].counts['parts'])
+    eq_(6, stats.stages['body'].calls)
+
+    out = StringIO()
+    stats.dump(out)
+    lines = out.getvalue().splitlines()
+    ok_(lines[0].startswith('stage'))
+    eq_(['tokenize', 'filter', 'traverse', 'headers', 'body'],
+        [l.split()[0] for l in lines[1:6]])
+    ok_('parts=12' in lines[3])
+    ok_(' us ' in out.getvalue())
+
+    stats.reset()
+    eq_({}, stats.stages)
+
+
+def test_stage_histogram():
+    stats = StageStats('body')
+    stats.add(0, {})
+    stats.add(0.0000015, {'bytes': 2})
+    stats.add(0.000003, {'bytes': 3})
+    stats.add(0.001, {})
+    eq_(4, stats.calls)
+    eq_({'bytes': 5}, stats.counts)
+    eq_([(1, 1), (2, 1), (4, 1)], stats.histogram()[:3])
+    eq_(4, sum(n for _, n in stats.histogram()))
+    eq_((1024, 1), stats.histogram()[-1])
@@ -5,8 +5,10 @@ from mock import *
 
 import email
 import json
+import tempfile
 
 from base64 import b64decode
+from contextlib import closing
 
 from flanker.mime import create
 from flanker.mime.message import errors
@@ -307,3 +309,35 @@ def create_newlines_in_headers_test():
     text = create.from_string(text.to_string())
     eq_('Hello,newline', text.headers['Subject'])
     eq_(u'Превед, медвед!', text.headers['To'])
+
+
+def from_file_test():
+    for name in ("messages/torture.eml", "messages/enclosed.eml",
+                 "messages/bounce/delayed.eml"):
+        string = open(fixture_file(name)).read()
+        expected = create.from_string(string)
+        message = create.from_file(fixture_file(name))
+
+        eq_([str(p.content_type) for p in expected.walk(with_self=True)],
+            [str(p.content_type) for p in message.walk(with_self=True)])
+        for a, b in zip(expected.walk(with_self=True),
+                        message.walk(with_self=True)):
+            eq_(a.headers.items(), b.headers.items())
+            eq_(a.body, b.body)
+        eq_(string, message.to_string())
+
+
+def from_file_changed_test():
+    message = create.from_file(fixture_file("messages/enclosed.eml"))
+    message.headers['Subject'] = u'Hello'
+    message.parts[0].body = u'Changed body'
+
+    message = create.from_string(message.to_string())
+    eq_(u'Hello', message.headers['Subject'])
+    eq_(u'Changed body', message.parts[0].body)
+
+
+def from_empty_file_test():
+    with closing(tempfile.NamedTemporaryFile()) as f:
+        message = create.from_file(f.name)
+        eq_('', message.body)
@@ -130,6 +130,34 @@ def headers_transform_encodedword_test():
     h.transform(lambda key,val: (key, val.replace(u'✓', u'☃')), decode=True)
     eq_(u'Hello ☃', h.get('Subject'))
 
+def headers_decoded_values_cache_test():
+    subject = encoding.to_mime('Subject', u'Hello ✓')
+    h = MimeHeaders([('Subject', subject), ('To', 'a@example.com')])
+
+    eq_(u'Hello ✓', h['Subject'])
+    eq_(u'Hello ✓', h.get('Subject'))
+    eq_([u'Hello ✓'], h.getall('Subject'))
+    eq_({'hits': 2, 'misses': 1, 'size': 1}, h.cache_stats())
+
+    h.items()
+    eq_({'hits': 3, 'misses': 2, 'size': 2}, h.cache_stats())
+
+    # changes invalidate the cache
+    h['Subject'] = u'Bye'
+    eq_(0, h.cache_stats()['size'])
+    eq_(u'Bye', h['Subject'])
+
+    h.prepend('Subject', encoding.to_mime('Subject', u'Hi ✓'))
+    eq_([u'Hi ✓', u'Bye'], h.getall('Subject'))
+
+    h.transform(lambda key, val: (key, val.replace(u'✓', u'☃')), decode=True)
+    eq_([u'Hi ☃', u'Bye'], h.getall('Subject'))
+
+    del h['Subject']
+    eq_(None, h['Subject'])
+    eq_(0, h.cache_stats()['size'])
+
+
 def headers_parsing_empty_test():
     h = MimeHeaders.from_stream(StringIO(""))
     eq_(0, len(h))
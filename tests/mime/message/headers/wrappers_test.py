@@ -1,4 +1,4 @@
-from nose.tools import eq_
+from nose.tools import eq_, ok_
 
 from flanker.mime.message.headers.wrappers import ContentType
 
@@ -8,3 +8,30 @@ def charset_test():
 
     c = ContentType('application', 'pdf')
     eq_(None, c.get_charset())
+
+
+def content_type_parts_test():
+    c = ContentType('text', 'html', {'charset': 'utf-8'})
+    eq_('text', c.main)
+    eq_('html', c.sub)
+    eq_('text/html', str(c))
+    eq_(ContentType('text', 'html', {'charset': 'utf-8'}), c)
+
+
+def content_type_case_test():
+    # main and sub keep the case of the arguments, the value and the
+    # comparisons are lower-cased
+    c = ContentType('Multipart', 'Mixed', {'boundary': 'Bd'})
+    eq_(('Multipart', 'Mixed'), (c.main, c.sub))
+    eq_(('multipart', 'mixed'), (c.format_type, c.subtype))
+    eq_('multipart/mixed', c.value)
+    eq_('Multipart/Mixed', str(c))
+    eq_("ContentType('Multipart', 'Mixed', {'boundary': 'Bd'})", repr(c))
+    eq_(c, 'multipart/mixed')
+    eq_(c, ContentType('multipart', 'mixed', {'boundary': 'Bd'}))
+    ok_(isinstance(c, ContentType))
+    ok_(not hasattr(ContentType('multipart', 'mixed'), '__dict__'))
+    ok_(c.is_multipart())
+    ok_(not c.is_singlepart())
+    # parameters keep their case
+    eq_('Bd', c.get_boundary())
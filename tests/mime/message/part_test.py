@@ -571,3 +571,136 @@ def test_encode_transfer_encoding():
     encoded_body = encode_transfer_encoding('base64', body)
     # according to  RFC 5322 line "SHOULD be no more than 78 characters"
     assert_less(max([len(l) for l in encoded_body.splitlines()]), 79)
+
+
+def test_parts_have_no_instance_dict():
+    message = scan(ENCLOSED)
+    for part in message.walk(with_self=True):
+        assert_false(hasattr(part, '__dict__'))
+        assert_false(hasattr(part._container, '__dict__'))
+        assert_false(hasattr(part.content_type, '__dict__'))
+
+
+def iter_body_test():
+    for source in (BILINGUAL, BZ2_ATTACHMENT, ENCLOSED, EIGHT_BIT,
+                   QUOTED_PRINTABLE, MAILGUN_PIC, IPHONE):
+        for chunk_size in (1, 7, 1024):
+            message = scan(source)
+            for part in message.walk(with_self=True):
+                chunks = list(part.iter_body(chunk_size))
+                # iterating does not load the whole body
+                ok_(part._container._body is None)
+                eq_(part.body or '', ''.join(chunks))
+
+
+def iter_changed_body_test():
+    message = scan(BILINGUAL)
+    message.body = u'Как ты поживаешь?'
+    eq_([u'Как ты', u' пожив', u'аешь?'], list(message.iter_body(6)))
+    eq_([], list(scan(MULTIPART).iter_body()))
+
+
+def body_to_stream_test():
+    message = scan(MAILGUN_PIC)
+    attachment = message.parts[1]
+    with closing(StringIO()) as out:
+        attachment.body_to_stream(out, chunk_size=100)
+        eq_(attachment.body, out.getvalue())
+
+    message = scan(BILINGUAL)
+    with closing(StringIO()) as out:
+        message.body_to_stream(out, chunk_size=3)
+        eq_(message.body, out.getvalue().decode('utf-8'))
+
+
+def iter_body_streams_test():
+    # the data after the ignored pad is not held back till the end
+    message = scan('Content-Type: application/octet-stream\r\n'
+                   'Content-Transfer-Encoding: base64\r\n\r\n'
+                   '=QUJD' + 'QUJD' * 1000 + 'QQ==\r\n')
+    chunks = list(message.iter_body(100))
+    eq_('ABC' * 1001 + 'A', ''.join(chunks))
+    ok_(len(chunks) > 10)
+
+    # neither is a long line, which is split outside of the escapes
+    message = scan('Content-Type: text/plain\r\n'
+                   'Content-Transfer-Encoding: quoted-printable\r\n\r\n' +
+                   'a=3Db' * 1000)
+    chunks = list(message.iter_body(7))
+    eq_(u'a=b' * 1000, u''.join(chunks))
+    ok_(len(chunks) > 100)
+
+
+def iter_body_broken_encoding_test():
+    message = scan('Content-Type: application/octet-stream\r\n'
+                   'Content-Transfer-Encoding: base64\r\n\r\n'
+                   'QUJD\r\nRA\r\n')
+    with assert_raises(DecodingError):
+        list(message.iter_body())
+
+
+def to_segments_test():
+    message = scan(ENCLOSED)
+    message.parts[1].enclosed.parts[0].headers['X-Test'] = u'1'
+    segments = message.to_segments()
+
+    # the unchanged parts are not copied, the new header is prepended
+    # to the original part
+    buffers = [str(s) for s in segments if isinstance(s, buffer)]
+    eq_([message.parts[0]._container.read_message(),
+         message.parts[1].enclosed.parts[0]._container.read_message(),
+         message.parts[1].enclosed.parts[1]._container.read_message()],
+        buffers)
+    ok_('X-Test: 1\r\n' in segments)
+    eq_(message.to_string(), ''.join(str(s) for s in segments))
+    eq_(len(message.to_string()), message.size)
+
+    with closing(StringIO()) as out:
+        message.to_stream(out)
+        eq_(message.to_string(), out.getvalue())
+
+    # a changed body is rendered
+    message = scan(ENCLOSED)
+    message.parts[0].body = u'Bye'
+    segments = message.to_segments()
+    ok_('Bye' in segments)
+    eq_(message.to_string(), ''.join(str(s) for s in segments))
+
+    # unchanged messages are one segment
+    message = scan(ENCLOSED)
+    eq_([ENCLOSED], [str(s) for s in message.to_segments()])
+
+
+class StrWriter(object):
+    """File like object that takes byte strings only"""
+
+    def __init__(self):
+        self.written = []
+
+    def write(self, data):
+        if not isinstance(data, str):
+            raise TypeError("expected str, got {0}".format(type(data)))
+        self.written.append(data)
+
+
+def to_stream_str_writer_test():
+    for change in (False, True):
+        message = scan(ENCLOSED)
+        if change:
+            message.parts[1].enclosed.parts[0].headers['X-Test'] = u'1'
+        out = StrWriter()
+        message.to_stream(out)
+        eq_(message.to_string(), ''.join(out.written))
+
+
+def to_segments_broken_encoding_test():
+    """The changed part that can not be serialized is output unchanged"""
+    message = scan(ENCLOSED_BROKEN_ENCODING)
+    for p in message.walk():
+        try:
+            p.headers['A'] = 'b'
+        except:
+            pass
+    segments = message.to_segments()
+    ok_(segments)
+    eq_(message.to_string(), ''.join(str(s) for s in segments))
@@ -1,9 +1,13 @@
 # coding:utf-8
 from nose.tools import *
 from mock import *
-from flanker.mime.message.scanner import scan, ContentType, Boundary
+from flanker.mime.message.scanner import (scan, scan_headers, tokenize,
+                                          ContentType, Boundary,
+                                          IncrementalScanner)
 from flanker.mime.message.errors import DecodingError
+from flanker.mime.message import scanner
 from email import message_from_string
+from collections import deque
 
 from ... import *
 
@@ -236,6 +240,166 @@ def missing_newline_test():
     eq_("hello, world", message.body)
 
 
+def incremental_scanner_test():
+    for string in (ENCLOSED, TORTURE, DASHED_BOUNDARIES, NOTIFICATION,
+                   MISSING_FINAL_BOUNDARY):
+        expected = scan(string)
+        for size in (5, 97, 4096):
+            scanner = IncrementalScanner()
+            for i in xrange(0, len(string), size):
+                scanner.feed(string[i:i + size])
+            message = scanner.close()
+
+            eq_(tree_to_string(expected), tree_to_string(message))
+            eq_(repr(tokenize(string)), repr(scanner._tokens))
+            eq_(string, message.to_string())
+
+
+def incremental_scanner_long_line_test():
+    body = "x" * 10000
+    string = "Content-Type: text/plain\r\n\r\n" + body + "\r\nend\r\n"
+    scanner = IncrementalScanner()
+    with patch.object(scanner, '_scan', wraps=scanner._scan) as m:
+        for i in xrange(len(string)):
+            scanner.feed(string[i])
+        # only the chunks completing a line are scanned
+        eq_(string.count('\n'), m.call_count)
+    eq_(string, scanner.close().to_string())
+
+
+def incremental_scanner_header_blocks_test():
+    scanner = IncrementalScanner()
+    eq_([], scanner.feed(ENCLOSED[:2000]))
+
+    blocks = scanner.feed(ENCLOSED[2000:3000])
+    eq_(['multipart/mixed', 'text/plain', 'message/rfc822'],
+        [str(b.content_type) for b in blocks])
+    eq_(3000, scanner.size)
+
+    message = scan(ENCLOSED)
+    for block, part in zip(blocks, message.walk(with_self=True)):
+        eq_(part.headers.items(), block.headers.items())
+    eq_(0, blocks[0].start)
+    eq_(message.parts[0].body,
+        ENCLOSED[blocks[1].body_start:blocks[1].body_start +
+                 len(message.parts[0].body)])
+
+    blocks = scanner.feed(ENCLOSED[3000:])
+    eq_(['multipart/alternative', 'text/plain', 'text/html'],
+        [str(b.content_type) for b in blocks])
+    eq_(u'"Александр Клижентас☯" <bob@example.com>',
+        scanner.close().headers['To'])
+
+
+def incremental_scanner_folded_content_type_test():
+    scanner = IncrementalScanner()
+    scanner.feed("Content-Type: multipart/mixed;\r\n")
+    scanner.feed(" boundary=\"bd\"\r\n\r\n--bd\r\n\r\nhi\r\n--bd--\r\n")
+    message = scanner.close()
+    eq_('bd', message.content_type.get_boundary())
+    eq_(1, len(message.parts))
+
+    assert_raises(DecodingError, scanner.feed, "more")
+
+
+def scan_headers_test():
+    for string in (ENCLOSED, TORTURE, NO_CTYPE, BOUNCE, SIGNED, TEXT_ONLY,
+                   DASHED_BOUNDARIES, ENCLOSED_BROKEN_BOUNDARY, ""):
+        expected = scan(string)
+        block = scan_headers(string)
+        eq_(expected.headers.items(), block.headers.items())
+        eq_(expected._container._body_start, block.body_start)
+
+        message = scan(string, headers=block)
+        eq_(tree_to_string(expected), tree_to_string(message))
+        ok_(message.headers is block.headers)
+        eq_(string, message.to_string())
+
+
+def scan_headers_does_not_scan_body_test():
+    string = "Content-Type: multipart/mixed; boundary=bd\r\n" \
+             "Subject: hi\r\n\r\n--bd\r\n\r\nhi\r\n--bd--\r\n"
+    with patch.object(scanner, '_make_token', wraps=scanner._make_token) as m:
+        block = scan_headers(string)
+    eq_(2, m.call_count)
+    eq_('multipart/mixed', block.content_type)
+    eq_('hi', block.headers['Subject'])
+    eq_('--bd', string[block.body_start:block.body_start + 4])
+
+    message = scan(string, headers=block)
+    eq_(1, len(message.parts))
+    eq_('hi', message.parts[0].body)
+
+
+def lazy_scan_test():
+    for string in (ENCLOSED, TORTURE, NO_CTYPE, BOUNCE, AOL_FBL, NDN,
+                   DASHED_BOUNDARIES, MISSING_FINAL_BOUNDARY, ""):
+        expected = scan(string)
+        message = scan(string, lazy=True)
+        eq_(tree_to_string(expected), tree_to_string(message))
+        eq_([(p._container.start, p._container.end)
+             for p in expected.walk(with_self=True)],
+            [(p._container.start, p._container.end)
+             for p in message.walk(with_self=True)])
+        eq_(string, message.to_string())
+
+
+def lazy_scan_traverses_on_demand_test():
+    message = scan(ENCLOSED, lazy=True)
+    iterator = message.parts._iterator
+    eq_('text/plain', message.parts[0].content_type)
+    pulled = len(iterator.tokens)
+    ok_(pulled < len(tokenize(ENCLOSED)))
+    ok_(iterator._pending is not None)
+
+    # nothing that has not been traversed can change
+    message.parts[0].body = u'changed'
+    eq_(pulled, len(iterator.tokens))
+    ok_(message.was_changed())
+    eq_(pulled, len(iterator.tokens))
+
+    expected = scan(ENCLOSED)
+    expected.parts[0].body = u'changed'
+    eq_(expected.to_string(), message.to_string())
+    eq_(len(expected.parts), len(message.parts))
+    eq_(None, iterator._pending)
+
+
+def lazy_scan_broken_message_test():
+    string = "Content-Type: multipart/mixed; boundary=a\r\n\r\n" \
+             "--a\r\nContent-Type: multipart/mixed; boundary=b\r\n\r\n" \
+             "no boundaries\r\n--a--\r\n"
+    assert_raises(DecodingError, scan, string)
+
+    message = scan(string, lazy=True)
+    eq_('multipart/mixed', message.content_type)
+    assert_raises(DecodingError, lambda: list(message.walk()))
+
+
+def tokenize_searches_declared_boundaries_test():
+    noise = "-- \r\nJohn\r\n--- a/setup.py\r\n+++ b/setup.py\r\n--db\r\n" \
+            "content-type: multipart/mixed; boundary=db\r\n--\r\n\r\n"
+    string = "Content-Type: multipart/mixed; boundary=bd\r\n\r\n" + \
+             noise + "--bd\r\nContent-Type: text/plain\r\n\r\n" + \
+             noise * 10 + "--bd--\r\n" + noise
+
+    # only the real boundaries are allocated
+    with patch.object(scanner, '_grab_newline',
+                      wraps=scanner._grab_newline) as grab_newline:
+        tokens = tokenize(string)
+    eq_(['multipart/mixed', 'bd', 'text/plain', 'bd'],
+        [getattr(t, 'value', t) for t in tokens])
+    eq_(2 * 2, grab_newline.call_count)
+
+    # the same tokens as filtering all the lines that start with "--"
+    for string in (string, ENCLOSED, TORTURE, DASHED_BOUNDARIES, NDN,
+                   MISSING_FINAL_BOUNDARY, BOUNCE):
+        tokens = deque(scanner._make_token(m, string)
+                       for m in scanner._RE_TOKENIZER.finditer(string))
+        eq_(repr(scanner._filter_false_tokens(tokens)),
+            repr(tokenize(string)))
+
+
 def tree_to_string(part):
     parts = []
     print_tree(part, parts, "")